@@ -0,0 +1,75 @@
+"""
+Benchmark of the extractive pre-summarization used by ``!summarize_youtube``.
+
+Builds synthetic auto-caption transcripts (unpunctuated: half common words,
+half a large vocabulary of rare ones, with a few recurring topics) of increasing length and reports how
+long ``extract_sentences`` takes, how many tokens it leaves for the LLM and
+which share of the kept sentences are on one of the topics.
+
+Run from the repository root with the bot's environment configured:
+
+    python -m benchmarks.bench_extractive
+"""
+
+import random
+import statistics
+import time
+from galaxtic import settings
+from galaxtic.utils.chunker import estimate_tokens
+from galaxtic.utils.extractive import STOPWORDS, extract_sentences, split_sentences
+
+# Tokens a transcript may take in a single summarization call
+BUDGET = settings.AI.CONTEXT_TOKENS // 2 - 50
+# Roughly 150 spoken words per minute
+WORDS_PER_MINUTE = 150
+MINUTES = (10, 30, 60, 120, 240)
+REPEATS = 5
+COMMON = sorted(STOPWORDS)
+
+
+def transcript(minutes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    filler = ["".join(rng.choices("aeioubdgklmnprst", k=rng.randint(3, 8))) for _ in range(5000)]
+    topics = [[f"topic{'abcdef'[t]}{'ghijklmn'[i]}" for i in range(8)] for t in range(6)]
+    words = []
+    for _ in range(minutes * WORDS_PER_MINUTE // 20):
+        # Each 20-word stretch is filler, sometimes about one of the topics
+        stretch = rng.choices(COMMON, k=10) + rng.choices(filler, k=10)
+        rng.shuffle(stretch)
+        if rng.random() < 0.3:
+            topic = rng.choice(topics)
+            for i in rng.sample(range(20), 4):
+                stretch[i] = rng.choice(topic)
+        words.extend(stretch)
+    return " ".join(words)
+
+
+def on_topic(text: str) -> float:
+    sentences = split_sentences(text)
+    if not sentences:
+        return 0.0
+    return sum("topic" in sentence for sentence in sentences) / len(sentences)
+
+
+def main() -> None:
+    print(f"budget: {BUDGET} tokens")
+    print(
+        f"{'minutes':>8} {'tokens in':>10} {'tokens out':>11} {'median ms':>10}"
+        f" {'on topic in':>12} {'on topic out':>13}"
+    )
+    for minutes in MINUTES:
+        text = transcript(minutes)
+        timings = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            result = extract_sentences(text, BUDGET)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{minutes:>8} {estimate_tokens(text):>10} {estimate_tokens(result):>11}"
+            f" {statistics.median(timings) * 1000:>10.1f}"
+            f" {on_topic(text):>12.0%} {on_topic(result):>13.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
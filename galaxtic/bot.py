@@ -1,9 +1,12 @@
 import os
 from discord.ext.commands import Bot
 from galaxtic import logger, settings
-from galaxtic.db import setup_database, get_db
+from galaxtic.db import setup_database, close_database, get_db
+from galaxtic.utils.llm import close_llm
+from galaxtic.utils.response_cache import close_response_cache
+from galaxtic.utils.transcripts import close_transcript_store
+from galaxtic.utils.search import close_search_index
 import discord
-from together import Together
 from seafileapi import Repo
 from surrealdb import RecordID
 
@@ -11,7 +14,6 @@ from surrealdb import RecordID
 class GalaxticBot(Bot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, intents=discord.Intents.all(), **kwargs)
-        self.together_client = Together(api_key=settings.AI.TOGETHER_API_KEY)
         self.seafile_client = Repo(
             token=settings.SEAFILE.REPO_API_TOKEN,
             server_url=settings.SEAFILE.SERVER_URL,
@@ -65,3 +67,12 @@ class GalaxticBot(Bot):
             }
             if bot_info != new_info:
                 await db.merge(RecordID("bot_info", self.user.id), new_info)
+
+    async def close(self):
+        await super().close()
+        await close_llm()
+        close_response_cache()
+        close_transcript_store()
+        await close_search_index()
+        logger.info("Closing database connections...")
+        await close_database()
@@ -4,75 +4,98 @@ from discord import app_commands
 import discord
 from galaxtic import logger, settings
 from galaxtic.bot import GalaxticBot
-import aiohttp
 from io import BytesIO
-from galaxtic.db import get_db
-from langchain.memory import ConversationBufferMemory
-from langchain_core.messages import HumanMessage, AIMessage
-from collections import defaultdict
-from datetime import datetime
-from galaxtic.utils.ai import llama_chat
+from galaxtic.db import (
+    AIMessageRepo,
+    AIChannelRepo,
+    BatchWriter,
+    RetentionJob,
+    RetentionPolicy,
+)
+from galaxtic.db.repos import utcnow_iso
+from galaxtic.utils.ai import (
+    Priority,
+    admit,
+    cached_chat_stream,
+    llama_chat,
+    llama_chat_stream,
+    origin,
+)
+from galaxtic.utils.stream import MessageStreamer
+from galaxtic.utils.conversation import ChannelHistory, ConversationStore
+from galaxtic.utils.reply_scheduler import ReplyScheduler
+from galaxtic.utils.summarize import MapReduceSummarizer
+from galaxtic.utils.extractive import extract_sentences
+from galaxtic.utils.chunker import estimate_tokens, split_message
+from galaxtic.utils.llm import CHAT_MODEL, get_llm, InvalidRequestError
+from galaxtic.utils.images import ImageLimitError, ImageService
+from galaxtic.utils.response_cache import get_response_cache, response_key
+from galaxtic.utils.transcripts import get_transcript_store
+from galaxtic.utils.search import get_search_index
+from galaxtic.utils.subtitles import fetch_transcript
+from galaxtic.utils.translate import translate_many
+from galaxtic.utils.langid import (
+    NO_LANGUAGE,
+    detect_language,
+    needs_translation,
+    source_hint,
+)
+from typing import Literal
 import re
 import asyncio
-from together.error import InvalidRequestError
-import os
-import tempfile
-import yt_dlp
-import webvtt
-
-async def extract_transcript_from_ytdlp_async(url: str) -> str:
-    return await asyncio.get_running_loop().run_in_executor(None, lambda: _extract_vtt_transcript(url))
-
-
-def webvtt_json(path, dedupe, single):
-    captions = webvtt.read(path)
-    dicts = [{"start": c.start, "end": c.end, "lines": c.lines} for c in captions]
-    if dedupe:
-        dicts = []
-        prev_line = None
-        for c in captions:
-            if any("<c>" in l for l in c.lines):
-                continue
-            not_dupe_lines = []
-            for line in c.lines:
-                if not line.strip():
-                    continue
-                if line != prev_line:
-                    not_dupe_lines.append(line)
-                prev_line = line
-            if not_dupe_lines:
-                dicts.append({"start": c.start, "end": c.end, "lines": not_dupe_lines})
-    if single:
-        for d in dicts:
-            d["line"] = "\n".join(d.pop("lines"))
-    return dicts
-
-def _extract_vtt_transcript(url: str) -> str:
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        ydl_opts = {
-            "skip_download": True,
-            "writesubtitles": True,
-            "writeautomaticsub": True,
-            "subtitleslangs": ["en"],
-            "outtmpl": os.path.join(tmp_dir, "%(id)s.%(ext)s"),
-            "quiet": True,
-            "cookiefile": settings.COOKIES_FILE,
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            video_id = info.get("id")
-            ydl.download([url])
-
-        for file in os.listdir(tmp_dir):
-            if file.endswith(".vtt") and video_id in file:
-                path = os.path.join(tmp_dir, file)
-
-                items = webvtt_json(path, dedupe=True, single=True)
-                lines = [i["line"].strip() for i in items if i.get("line", "").strip()]
-                return " ".join(lines)
-
-        raise RuntimeError("No subtitles found.")
+import time
+
+# Leave half of the context window for the model's answer
+PROMPT_TOKENS = settings.AI.CONTEXT_TOKENS // 2
+
+SUBTITLE_LANG = "en"
+
+TRANSLATE_PROMPT = """You are an expert translator. Your task is to translate the provided text into the English language.
+    The translation should be accurate and maintain the original meaning.
+    Format your response as a single, clear translation without explanations or additional text.
+    {source}Translate this text: {text}"""
+
+# Replies for text that is answered without calling the model
+SKIP_TRANSLATION = {
+    "en": "This text is already in English.",
+    NO_LANGUAGE: "There is nothing to translate here.",
+}
+
+SUMMARIZE_PROMPT = """You are an expert summarizer. Your task is to create a concise summary of the provided text.
+    The summary should capture the main points and essence of the text without losing important details.
+    Format your response as a single, clear summary without explanations or additional text.
+    Summarize this text: {text}"""
+
+YOUTUBE_PROMPT = "You are an expert summarizer. Do not mention about transcript only give the summary. Please summarize this YouTube video transcript:\n{text}"
+
+ENHANCE_PROMPT = """You are an expert at crafting detailed image generation prompts without losing any details in the original prompt.
+            Your task is to enhance the given prompt by:
+            1. Adding more descriptive details about style, lighting, and composition
+            2. Including relevant artistic terms and techniques
+            3. Specifying camera angles and perspectives if applicable
+            4. Adding mood and atmosphere descriptors
+            5. Keep the core idea of the original prompt intact
+            
+            Format your response as a single, detailed prompt without explanations or additional text."""
+
+ENHANCE_PARAMS = {
+    "temperature": 0.5,
+    "top_p": 0.7,
+    "top_k": 50,
+    "repetition_penalty": 1.1,
+}
+
+FOLD_PROMPT = """You maintain the memory of a group chat. Update the summary of the earlier conversation with the new messages below.
+    Keep who said what, names, facts, decisions and open questions; drop small talk. Reply with the updated summary only, in at most {words} words.
+    Current summary: {summary}
+    New messages:
+{lines}"""
+
+
+def translate_prompt(lang: str) -> str:
+    """TRANSLATE_PROMPT with the detected source language filled in."""
+    return TRANSLATE_PROMPT.replace("{source}", source_hint(lang))
+
 
 @app_commands.context_menu(name="Translate Message")
 @app_commands.describe(message="The message you want to translate")
@@ -81,100 +104,158 @@ async def translate_message(interaction: discord.Interaction, message: discord.M
     if not message.content:
         await interaction.followup.send("Message has no content to translate.")
         return
-    prompt = f"""You are an expert translator. Your task is to translate the provided text into the English language.
-        The translation should be accurate and maintain the original meaning.
-        Format your response as a single, clear translation without explanations or additional text.
-        Translate this text: {message.content}"""
-    response = await llama_chat(interaction.client, prompt=prompt)
-    await interaction.followup.send(response)
+    lang = detect_language(message.content)
+    if not needs_translation(lang):
+        await interaction.followup.send(SKIP_TRANSLATION[lang])
+        return
+    streamer = MessageStreamer(
+        lambda content: interaction.followup.send(content, wait=True)
+    )
+    await streamer.stream(
+        cached_chat_stream(
+            interaction.client,
+            translate_prompt(lang),
+            message.content,
+            **origin(interaction),
+        )
+    )
 
 
 class AI(Cog):
     def __init__(self, bot: GalaxticBot):
         self.bot = bot
         self.ai_channel_cache = set()
-        self.channel_memories = defaultdict(lambda: ConversationBufferMemory())
+        self.conversations = ConversationStore(
+            turns=settings.AI.HISTORY_TURNS,
+            max_channels=settings.AI.HISTORY_MAX_CHANNELS,
+            max_chars=settings.AI.HISTORY_MAX_CHARS,
+            max_tokens=settings.AI.HISTORY_TOKENS,
+            summarize=self.fold_history,
+            fold_tokens=settings.AI.HISTORY_FOLD_TOKENS,
+            summary_tokens=settings.AI.HISTORY_SUMMARY_TOKENS,
+        )
+        self.messages = AIMessageRepo()
+        self.channels = AIChannelRepo()
+        self.message_log = BatchWriter(
+            self.messages.add_many,
+            max_batch=settings.SURREALDB.WRITE_BATCH_SIZE,
+            flush_interval=settings.SURREALDB.WRITE_FLUSH_INTERVAL_MS / 1000,
+            max_pending=settings.SURREALDB.WRITE_MAX_PENDING,
+            name="ai_message",
+        )
+        self.replies = ReplyScheduler(
+            self.reply_to,
+            window=settings.AI.REPLY_DEBOUNCE_MS / 1000,
+            max_wait=settings.AI.REPLY_MAX_WAIT,
+        )
+        self.images = ImageService(
+            workers=settings.AI.IMAGE_WORKERS,
+            max_queued=settings.AI.IMAGE_MAX_QUEUED,
+            per_user=settings.AI.IMAGE_USER_JOBS,
+            per_guild=settings.AI.IMAGE_GUILD_JOBS,
+        )
+        self._hydrating: dict[tuple[str, str], asyncio.Task] = {}
+        self._prewarm_limit = asyncio.Semaphore(settings.AI.PREWARM_CONCURRENCY)
+        self._prewarm_task: asyncio.Task | None = None
+        self.transcripts = get_transcript_store()
+        self.recall_index = get_search_index()
+        self.retention = RetentionJob(
+            RetentionPolicy.from_settings(settings.RETENTION),
+            self.messages,
+            self.channels,
+            self.recall_index,
+        )
         
     def extract_video_id(self, url: str) -> str | None:
         match = re.search(r"(?:v=|youtu\.be/)([A-Za-z0-9_-]{11})", url)
         return match.group(1) if match else None
     
-    def split_text(self, text: str, limit: int = 2000) -> list[str]:
-        chunks = []
-        start = 0
-        while start < len(text):
-            end = start + limit
-            if end >= len(text):
-                chunks.append(text[start:].strip())
-                break
-
-            # Try to split at the last sentence-ending punctuation within the limit
-            split_point = max(
-                text.rfind(punct, start, end)
-                for punct in (".", "!", "?", " ")
-            )
-
-            if split_point == -1 or split_point <= start:
-                split_point = end  # Hard split
-
-            chunks.append(text[start:split_point].strip())
-            start = split_point
-
-        return chunks
-
-    async def progressive_summary(self, transcript) -> str:
-        print(transcript)
-        transcript_chunks = self.split_text(transcript, 20000)
-        print(f"Transcript split into {len(transcript_chunks)} chunks")
-        print(f"Sample chunk: {transcript_chunks[0][:100]}...")  # Print first 100 chars of first chunk
-        summaries = []
-
-        for i, chunk in enumerate(transcript_chunks):
-            prompt = f"Part {i+1}/{len(transcript_chunks)} of a long transcript:\n{chunk}\n\nPlease summarize this part clearly and briefly."
-            try:
-                response = await llama_chat(self.bot, prompt)
-                summaries.append(response.strip())
-                await asyncio.sleep(1)
-            except Exception as e:
-                logger.exception(f"Failed to summarize chunk {i+1}")
-                continue
-
-        if not summaries:
-            return "Failed to produce any summaries."
-
-        final_prompt = (
-            "Here are partial summaries of a long transcript. Do not mention about transcript only give the summary. Combine them into one final clear and concise summary:\n\n"
-            + "\n\n".join(summaries)
+    async def send_chunks(self, ctx: commands.Context, msg: discord.Message, text: str):
+        # An empty result would otherwise leave the placeholder up for good
+        chunks = split_message(text) or ["No summary produced."]
+        await msg.edit(content=chunks[0])
+        for chunk in chunks[1:]:
+            await ctx.send(chunk)
+
+    async def progressive_summary(
+        self, transcript: str, guild_id=None, user_id=None
+    ) -> str:
+        summarizer = MapReduceSummarizer(
+            lambda prompt: llama_chat(
+                self.bot,
+                prompt,
+                priority=Priority.BACKGROUND,
+                guild_id=guild_id,
+                user_id=user_id,
+            ),
+            chunk_tokens=PROMPT_TOKENS,
+            reduce_tokens=PROMPT_TOKENS,
+            max_concurrency=settings.AI.SUMMARY_CONCURRENCY,
         )
-        return await llama_chat(self.bot, final_prompt)
+        return await summarizer.summarize(transcript)
 
     
     @commands.command(name="summarize_youtube", aliases=['syt', 'summarize_yt'], description="Summarize a YouTube video")
-    async def summarize_youtube(self, ctx: commands.Context, url: str):
+    async def summarize_youtube(
+        self,
+        ctx: commands.Context,
+        url: str,
+        mode: Literal["fast", "full"] = "fast",
+    ):
+        """
+        Summarize a YouTube video from its subtitles.
+
+        Long videos are first cut down to their key sentences so the model
+        reads them in one go; add ``full`` to summarize every part instead.
+        """
         async with ctx.typing():
             msg = await ctx.send("Processing...")
             try:
-                transcript_text = await extract_transcript_from_ytdlp_async(url)
-                prompt = f"You are an expert summarizer. Do not mention about transcript only give the summary. Please summarize this YouTube video transcript:\n{transcript_text}"
-                summary = await llama_chat(self.bot, prompt)
-                await msg.delete()
-                for chunk in self.split_text(summary):
-                    await ctx.send(chunk)
-                    await asyncio.sleep(1)
-            except InvalidRequestError as e:
-                if "must be <=" in str(e):
-                    try:
-                        summary = await self.progressive_summary(transcript_text)
-                        await msg.delete()
-                        for chunk in self.split_text(summary):
-                            await ctx.send(chunk)
-                            await asyncio.sleep(1)
-                    except Exception as e:
-                        logger.exception("Failed to summarize progressively.")
-                        await msg.edit(content="Failed.")
+                video_id = self.extract_video_id(url)
+                transcript_text = None
+                if video_id:
+                    if mode == "fast":
+                        summary = await self.transcripts.summary(
+                            video_id, SUBTITLE_LANG
+                        )
+                        if summary:
+                            await self.send_chunks(ctx, msg, summary)
+                            return
+                    transcript_text = await self.transcripts.text(
+                        video_id, SUBTITLE_LANG
+                    )
+                if transcript_text is None:
+                    transcript_text = await fetch_transcript(url, SUBTITLE_LANG)
+                    if video_id:
+                        await self.transcripts.put_text(
+                            video_id, SUBTITLE_LANG, transcript_text
+                        )
+                if mode == "fast":
+                    transcript_text = await asyncio.to_thread(
+                        extract_sentences,
+                        transcript_text,
+                        PROMPT_TOKENS - estimate_tokens(YOUTUBE_PROMPT),
+                    )
+                prompt = YOUTUBE_PROMPT.format(text=transcript_text)
+                if estimate_tokens(prompt) <= PROMPT_TOKENS:
+                    streamer = MessageStreamer(
+                        lambda content: msg.edit(content=content), ctx.send
+                    )
+                    summary = await streamer.stream(
+                        llama_chat_stream(
+                            self.bot, prompt, priority=Priority.BACKGROUND, **origin(ctx)
+                        )
+                    )
                 else:
-                    logger.exception("Unexpected InvalidRequestError")
-                    await msg.edit(content="An error occurred while processing.")
+                    summary = await self.progressive_summary(
+                        transcript_text, **origin(ctx)
+                    )
+                    await self.send_chunks(ctx, msg, summary)
+                if video_id and summary:
+                    await self.transcripts.put_summary(video_id, SUBTITLE_LANG, summary)
+            except InvalidRequestError:
+                logger.exception("LLM rejected the summarization request")
+                await msg.edit(content="An error occurred while processing.")
             except Exception as e:
                 logger.exception("Error during YouTube summarization")
                 await msg.edit(content="An error occurred during summarization.")
@@ -193,12 +274,16 @@ class AI(Cog):
                 if not text:
                     await ctx.send("Could not find the message to translate.")
                     return
-            prompt = f"""You are an expert translator. Your task is to translate the provided text into the English language.
-                The translation should be accurate and maintain the original meaning.
-                Format your response as a single, clear translation without explanations or additional text.
-                Translate this text: {text}"""
-            response = await llama_chat(self.bot, prompt=prompt)
-            await ctx.reply(response)
+            lang = detect_language(text)
+            if not needs_translation(lang):
+                await ctx.reply(SKIP_TRANSLATION[lang])
+                return
+            streamer = MessageStreamer(ctx.reply, ctx.send)
+            await streamer.stream(
+                cached_chat_stream(
+                    self.bot, translate_prompt(lang), text, **origin(ctx)
+                )
+            )
 
     @commands.command(name="summarize", description="Summarize a text")
     async def summarize(self, ctx: commands.Context, *, text: str | None = None):
@@ -215,84 +300,149 @@ class AI(Cog):
                 if not text:
                     await ctx.send("Could not find the message to summarize.")
                     return
-            prompt = f"""You are an expert summarizer. Your task is to create a concise summary of the provided text.
-                The summary should capture the main points and essence of the text without losing important details.
-                Format your response as a single, clear summary without explanations or additional text.
-                Summarize this text: {text}"""
-            response = await llama_chat(self.bot, prompt=prompt)
-            await ctx.reply(response)
+            streamer = MessageStreamer(ctx.reply, ctx.send)
+            await streamer.stream(
+                cached_chat_stream(self.bot, SUMMARIZE_PROMPT, text, **origin(ctx))
+            )
 
     image = app_commands.Group(name="image", description="Image Related Commands")
 
     @image.command(name="generate", description="Generate an image")
-    @app_commands.describe(prompt="The prompt for the image to generate")
-    async def generate(self, interaction: discord.Interaction, prompt: str):
+    @app_commands.describe(
+        prompt="The prompt for the image to generate",
+        count="How many variants to generate",
+    )
+    async def generate(
+        self,
+        interaction: discord.Interaction,
+        prompt: str,
+        count: app_commands.Range[int, 1, settings.AI.IMAGE_MAX_VARIANTS] = 1,
+    ):
         await interaction.response.defer()
+        try:
+            # Refuse before spending an LLM call on the prompt
+            self.images.check(**origin(interaction))
+        except ImageLimitError as e:
+            await interaction.followup.send(str(e))
+            return
         msg = await interaction.followup.send("Enhancing prompt...")
-        prompt = await self.enhance_image_prompt(prompt)
-        await msg.edit(content="Generating image...")
-        response = await self.generate_image(prompt)
+        prompt = await self.enhance_image_prompt(prompt, **origin(interaction))
+        if self.images.pending:
+            await msg.edit(content="Waiting for other images to finish...")
+        else:
+            await msg.edit(
+                content="Generating image..." if count == 1 else f"Generating {count} images..."
+            )
+        try:
+            images = await self.images.generate(prompt, count, **origin(interaction))
+        except ImageLimitError as e:
+            await msg.edit(content=str(e))
+            return
+        # Discord lays several image attachments of one message out as a grid
         await msg.edit(
-            content="", attachments=[discord.File(response, filename="image.png")]
+            content="",
+            attachments=[
+                discord.File(BytesIO(image), filename=f"image_{i}.png")
+                for i, image in enumerate(images, 1)
+            ],
         )
 
-    async def generate_image(self, prompt: str) -> BytesIO:
-        response = await self.bot.loop.run_in_executor(
-            None,
-            lambda: self.bot.together_client.images.generate(
-                model="black-forest-labs/FLUX.1-schnell-Free",
-                prompt=prompt,
-                n=1,
-                width=1024,
-                height=1024,
-                steps=4,
-            ),
-        )
-
-        if not response.data:
-            raise ValueError("Invalid response from image generation API")
-
-        image_url = response.data[0].url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(image_url) as response:
-                if response.status != 200:
-                    raise ValueError("Failed to download image")
-
-                image_data = await response.read()
-                return BytesIO(image_data)
-
-    async def enhance_image_prompt(self, prompt: str) -> str:
+    async def enhance_image_prompt(
+        self, prompt: str, guild_id=None, user_id=None
+    ) -> str:
+        """Enhanced version of ``prompt``, cached so repeats skip the LLM call."""
         enhance_msg = [
-            {
-                "role": "system",
-                "content": """You are an expert at crafting detailed image generation prompts without losing any details in the original prompt.
-            Your task is to enhance the given prompt by:
-            1. Adding more descriptive details about style, lighting, and composition
-            2. Including relevant artistic terms and techniques
-            3. Specifying camera angles and perspectives if applicable
-            4. Adding mood and atmosphere descriptors
-            5. Keep the core idea of the original prompt intact
-            
-            Format your response as a single, detailed prompt without explanations or additional text.""",
-            },
+            {"role": "system", "content": ENHANCE_PROMPT},
             {
                 "role": "user",
                 "content": f"Enhance this image generation prompt: {prompt}",
             },
         ]
 
-        enhanced_response = await self.bot.loop.run_in_executor(
-            None,
-            lambda: self.bot.together_client.chat.completions.create(
-                model="meta-llama/Llama-3.3-70B-Instruct-Turbo-Free",
-                messages=enhance_msg,
-                temperature=0.5,
-                top_p=0.7,
-                top_k=50,
-                repetition_penalty=1.1,
-            ),
-        )
-        return enhanced_response.choices[0].message.content.strip()
+        async def enhance() -> str:
+            async with admit(enhance_msg, Priority.INTERACTIVE, guild_id, user_id):
+                return await get_llm().chat(enhance_msg, **ENHANCE_PARAMS)
+
+        key = response_key(CHAT_MODEL, ENHANCE_PROMPT, prompt, ENHANCE_PARAMS)
+        return await get_response_cache().get(key, enhance)
+
+    @app_commands.command(
+        name="translate_recent",
+        description="Translate the latest messages of this channel to English",
+    )
+    @app_commands.describe(count="How many recent messages to translate")
+    async def translate_recent(
+        self,
+        interaction: discord.Interaction,
+        count: app_commands.Range[int, 1, 100] = 20,
+    ):
+        await interaction.response.defer()
+        messages = [
+            message
+            async for message in interaction.channel.history(limit=count)
+            if message.content
+        ]
+        if not messages:
+            await interaction.followup.send("No messages with text to translate.")
+            return
+        messages.reverse()  # oldest first
+        try:
+            translations = await translate_many(
+                self.bot, [message.content for message in messages], **origin(interaction)
+            )
+        except Exception:
+            logger.exception("Error translating recent messages")
+            await interaction.followup.send("An error occurred during translation.")
+            return
+        lines = [
+            f"**{message.author.display_name}**: {translation}"
+            for message, translation in zip(messages, translations)
+        ]
+        for chunk in split_message("\n".join(lines)):
+            await interaction.followup.send(
+                chunk, allowed_mentions=discord.AllowedMentions.none()
+            )
+
+    @app_commands.command(
+        name="recall", description="Search earlier messages of this server's AI channels"
+    )
+    @app_commands.describe(query="Words to look for")
+    async def recall(self, interaction: discord.Interaction, query: str):
+        # Results can come from channels other people cannot see
+        await interaction.response.defer(ephemeral=True)
+        guild = interaction.guild
+        if guild is None:
+            await interaction.followup.send("This command only works in a server.")
+            return
+        guild_id = str(guild.id)
+        readable = set()
+        for g, c in self.ai_channel_cache:
+            channel = guild.get_channel(int(c)) if g == guild_id else None
+            if (
+                channel is not None
+                and channel.permissions_for(interaction.user).read_message_history
+            ):
+                readable.add(c)
+        try:
+            hits = await self.recall_index.search(
+                query, guild_id=guild_id, channel_ids=readable, limit=5
+            )
+        except Exception:
+            logger.exception("Error searching the /recall index")
+            await interaction.followup.send("An error occurred during the search.")
+            return
+        if not hits:
+            await interaction.followup.send("No matching messages found.")
+            return
+        lines = [
+            f"**{hit['author']}** in <#{hit['channel_id']}> ({(hit['timestamp'] or '')[:10]})\n"
+            f"> {hit['content'][:300]}"
+            for hit in hits
+        ]
+        for chunk in split_message("\n".join(lines)):
+            await interaction.followup.send(
+                chunk, ephemeral=True, allowed_mentions=discord.AllowedMentions.none()
+            )
 
     @app_commands.command(
         name="ai_ask", description="Register a channel for Llama AI chat responses"
@@ -305,13 +455,10 @@ class AI(Cog):
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
         await interaction.response.defer()
-        db = get_db()
         guild_id = str(interaction.guild.id)
         channel_id = str(channel.id)
-        await db.query(
-            f"CREATE ai_channel SET guild_id='{guild_id}', channel_id='{channel_id}'"
-        )
-        logger.info(f"Channel {channel.name} registered for guild {guild_id}")
+        if await self.channels.add(guild_id, channel_id):
+            logger.info(f"Channel {channel.name} registered for guild {guild_id}")
         self.ai_channel_cache.add((guild_id, channel_id))
         await interaction.followup.send(
             f"{channel.mention} is now registered for Llama AI chat responses!",
@@ -326,51 +473,154 @@ class AI(Cog):
         channel_id = str(message.channel.id)
         key = (guild_id, channel_id)
         if key in self.ai_channel_cache:
-            async with message.channel.typing():
-                memory = self.channel_memories[key]
-                db = get_db()
-                # Store message in SurrealDB only if AI is enabled for this channel
-                await db.query(
-                    f"CREATE ai_message SET guild_id='{guild_id}', channel_id='{channel_id}', author={repr(message.author.display_name)}, content={repr(message.content)}, timestamp='{datetime.utcnow().isoformat()}'"
-                )
-                # Add user message to LangChain memory (new API)
-                memory.chat_memory.add_message(
-                    HumanMessage(
-                        content=message.content, name=message.author.display_name
-                    )
-                )
-                logger.info(
-                    f"Responding to message in channel {channel_id} of guild {guild_id}"
+            # Normally prewarmed in cog_load; covers evicted and new channels
+            try:
+                await self.ensure_history(key)
+            except Exception as e:
+                # Answer without the stored history rather than not at all
+                logger.warning(f"Could not load history of channel {channel_id}: {e}")
+            # Store message in SurrealDB only if AI is enabled for this channel;
+            # the write is batched in the background and never holds up replies
+            row = {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+                "author": message.author.display_name,
+                "content": message.content,
+                "timestamp": utcnow_iso(),
+            }
+            if not self.message_log.put_nowait(row):
+                logger.warning(
+                    f"ai_message buffer is full, message not stored"
+                    f" ({self.message_log.dropped} dropped so far)"
                 )
-                # If cache is empty (e.g., after restart), repopulate from DB
-                if len(memory.chat_memory.messages) == 1:  # Only the current message
-                    result = await db.query(
-                        f"SELECT ai_message.author, ai_message.content, ai_message.timestamp FROM ai_message WHERE guild_id='{guild_id}' AND channel_id='{channel_id}' ORDER BY ai_message.timestamp DESC LIMIT 20"
-                    )
-                    if result and result[0].get("result"):
-                        # Add messages in reverse order (oldest first), skip the last (current) message
-                        for row in reversed(result[0]["result"][1:]):
-                            memory.chat_memory.add_message(
-                                HumanMessage(
-                                    content=row["ai_message.content"],
-                                    name=row["ai_message.author"],
-                                )
-                            )
-                # Build chat history for prompt using LangChain memory (new API)
-                history = memory.chat_memory.messages[-10:]
-                history_prompt = "\n".join(
-                    [
-                        (
-                            f"{msg.name if hasattr(msg, 'name') and msg.name else 'AI'}: {msg.content}"
-                            if isinstance(msg, HumanMessage)
-                            else f"AI: {msg.content}"
-                        )
-                        for msg in history
-                    ]
+            try:
+                await self.recall_index.add(**row)
+            except Exception as e:
+                logger.warning(f"Could not index message for /recall: {e}")
+            self.conversations.add(key, message.author.display_name, message.content)
+            # Bursts are answered together once the channel goes quiet
+            self.replies.submit(key, message)
+
+    async def ensure_history(self, key: tuple[str, str]):
+        history = self.conversations.get(key)
+        if history is not None and history.hydrated:
+            return
+        task = self._hydrating.get(key) or self._load_histories([key])
+        await asyncio.shield(task)
+
+    def _load_histories(self, keys: list[tuple[str, str]]) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch_histories(keys))
+        for key in keys:
+            self._hydrating[key] = task
+
+        def done(task: asyncio.Task):
+            for key in keys:
+                if self._hydrating.get(key) is task:
+                    del self._hydrating[key]
+
+        task.add_done_callback(done)
+        return task
+
+    async def _fetch_histories(self, keys: list[tuple[str, str]]):
+        async with self._prewarm_limit:
+            recent = await self.messages.recent_by_channel(
+                [channel_id for _, channel_id in keys], self.conversations.turns
+            )
+        for key in keys:
+            history = self.conversations.get(key)
+            if history is not None and history.hydrated:
+                continue
+            # Rows come newest first
+            rows = reversed(recent.get(key, []))
+            self.conversations.hydrate(
+                key, [(row["author"], row["content"]) for row in rows]
+            )
+
+    async def prewarm_histories(self):
+        """Load the recent history of every AI channel before it is needed."""
+        keys = list(self.ai_channel_cache)
+        start = time.monotonic()
+        size = settings.AI.PREWARM_BATCH_SIZE
+        results = await asyncio.gather(
+            *(
+                self._load_histories(keys[i : i + size])
+                for i in range(0, len(keys), size)
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to prewarm AI channel histories: {result}")
+        logger.info(
+            f"Prewarmed {len(keys)} AI channel histories in {time.monotonic() - start:.2f}s"
+        )
+
+    async def fold_history(
+        self, key: tuple[str, str], summary: str, lines: list[str]
+    ) -> str:
+        """Fold turns that left the verbatim window into the running summary."""
+        prompt = FOLD_PROMPT.format(
+            words=settings.AI.HISTORY_SUMMARY_TOKENS * 3 // 4,
+            summary=summary or "(none)",
+            lines="\n".join(lines),
+        )
+        return await llama_chat(
+            self.bot, prompt, priority=Priority.BACKGROUND, guild_id=int(key[0])
+        )
+
+    async def related_turns(
+        self,
+        key: tuple[str, str],
+        batch: list[discord.Message],
+        history: ChannelHistory | None,
+    ) -> str:
+        """Older messages of the channel that match the burst, as prompt lines."""
+        limit = settings.AI.RECALL_PROMPT_TURNS
+        if not limit:
+            return ""
+        guild_id, channel_id = key
+        try:
+            hits = await self.recall_index.search(
+                " ".join(message.content for message in batch),
+                guild_id=guild_id,
+                channel_ids=(channel_id,),
+                # The burst and the verbatim history match best but add nothing
+                limit=limit + len(history or ()) + len(batch),
+            )
+        except Exception as e:
+            logger.warning(f"Could not search older messages of channel {channel_id}: {e}")
+            return ""
+        recent = {turn.content for turn in history or ()}
+        lines = [
+            f"{hit['author']}: {hit['content']}"
+            for hit in hits
+            if hit["content"] not in recent
+        ]
+        return "\n".join(lines[:limit])
+
+    async def reply_to(self, key: tuple[str, str], batch: list[discord.Message]):
+        """Answer a burst of messages in an AI channel with one reply."""
+        guild_id, channel_id = key
+        message = batch[-1]
+        async with message.channel.typing():
+            logger.info(
+                f"Responding to {len(batch)} message(s) in channel {channel_id} of guild {guild_id}"
+            )
+            history = self.conversations.get(key)
+            history_prompt = history.prompt if history else message.content
+            if history and history.summary:
+                history_prompt = (
+                    f"(Summary of earlier conversation: {history.summary})\n"
+                    f"{history_prompt}"
                 )
-                prompt = (
-                    f"""## 🤖 Name & Identity\nYour name is **GalaXtic**. You are a helpful assistant. Keep your messages short, like in normal text chats - **no long paragraphs**\nPrevious Chat History: {history_prompt}\nAI:"""
+            related = await self.related_turns(key, batch, history)
+            if related:
+                history_prompt = (
+                    f"(Possibly related older messages: {related})\n{history_prompt}"
                 )
+            prompt = (
+                f"""## 🤖 Name & Identity\nYour name is **GalaXtic**. You are a helpful assistant. Keep your messages short, like in normal text chats - **no long paragraphs**\nPrevious Chat History: {history_prompt}\nAI:"""
+            )
     #             prompt = (
     #                 """## 🤖 Name & Identity
     # - Your name is **GalaXtic**
@@ -437,33 +687,50 @@ class AI(Cog):
     # \n"""
     #                 f"{history_prompt}\nAI:"
     #             )
-                response = await llama_chat(self.bot, prompt)
-                # Add AI response to memory
-                memory.chat_memory.add_message(AIMessage(content=response))
-                await message.reply(response, mention_author=True)
+            streamer = MessageStreamer(
+                lambda content: message.reply(content, mention_author=True),
+                message.channel.send,
+            )
+            response = await streamer.stream(
+                llama_chat_stream(self.bot, prompt, **origin(message))
+            )
+            self.conversations.add(key, None, response)
 
     async def cog_load(self):
+        self.message_log.start()
+        try:
+            await self.recall_index.open()
+        except Exception:
+            logger.exception("Could not load the /recall search index")
+        if settings.RETENTION.ENABLED:
+            self.retention.start()
         # Register the group with the bot's command tree for test guild
         test_guild_id = settings.DISCORD.TEST_GUILD_ID
         if test_guild_id:
             test_guild = discord.Object(id=test_guild_id) if test_guild_id else None
             self.bot.tree.add_command(self.image, guild=test_guild)
             self.bot.tree.add_command(self.ai_ask, guild=test_guild)
+            self.bot.tree.add_command(self.translate_recent, guild=test_guild)
+            self.bot.tree.add_command(self.recall, guild=test_guild)
             self.bot.tree.add_command(translate_message, guild=test_guild)
         else:
             self.bot.tree.add_command(translate_message)
         # Populate AI channel cache from DB
-        db = get_db()
-        result = await db.query("SELECT guild_id, channel_id FROM ai_channel")
-        logger.info(f"AI channel cache result: {result}")
-        if result:
-            for row in result:
-                self.ai_channel_cache.add(
-                    (str(row["guild_id"]), str(row["channel_id"]))
-                )
+        self.ai_channel_cache.update(await self.channels.all())
         logger.info(
             f"AI channel cache populated with {len(self.ai_channel_cache)} channels"
         )
+        self._prewarm_task = asyncio.create_task(self.prewarm_histories())
+
+    async def cog_unload(self):
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+        await self.replies.close()
+        await self.images.close()
+        await self.conversations.close()
+        await self.retention.stop()
+        # Flush buffered chat logs before the cog goes away
+        await self.message_log.close()
 
 
 async def setup(bot: GalaxticBot):
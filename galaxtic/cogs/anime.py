@@ -2,15 +2,21 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import aiohttp
-from galaxtic.db import get_db
-from datetime import datetime
+from galaxtic.db import UserAnimeRepo
 from galaxtic import settings, logger
-from galaxtic.utils.ai import llama_chat
+from galaxtic.utils.ai import cached_chat, origin
+
+DESCRIPTION_PROMPT = (
+    "You are an expert anime assistant. Summarize and enhance the following anime description. "
+    "Make it engaging, concise, and avoid spoilers. Keep it under 1000 characters.\n"
+    "Description: {text}"
+)
 
 
 class Anime(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.user_anime = UserAnimeRepo()
 
     async def search_anilist(self, query):
         url = "https://graphql.anilist.co"
@@ -73,15 +79,11 @@ class Anime(commands.Cog):
             view.message = msg
 
     async def send_anime_confirmation(self, interaction, anime, message=None):
-        db = get_db()
         user_id = str(interaction.user.id)
         anime_id = anime["id"]
         # Check if anime already exists for this user
-        check_result = await db.query(
-            f"SELECT * FROM user_anime WHERE user_id='{user_id}' AND anime_id={anime_id} LIMIT 1"
-        )
-        logger.info(f"Check result: {check_result}")
-        already_added = bool(check_result)
+        already_added = await self.user_anime.exists(user_id, anime_id)
+        logger.info(f"Already added: {already_added}")
 
         # Build a detailed embed
         anime_type = anime.get("type", "N/A")
@@ -93,20 +95,16 @@ class Anime(commands.Cog):
             raw_desc = (
                 raw_desc.replace("<br>", "\n").replace("<i>", "").replace("</i>", "")
             )
-            # Use llama_chat to enhance and summarize the description
-            prompt = (
-                "You are an expert anime assistant. Summarize and enhance the following anime description. "
-                "Make it engaging, concise, and avoid spoilers. Keep it under 1000 characters.\n"
-                f"Description: {raw_desc}"
-            )
+            # Enhance and summarize the description (cached per description)
             try:
-                logger.info(f"Prompt: {prompt}")
-                desc = await llama_chat(self.bot, prompt)
+                desc = await cached_chat(
+                    self.bot, DESCRIPTION_PROMPT, raw_desc, **origin(interaction)
+                )
                 logger.info(f"Desc: {desc}")
                 if len(desc) > 1000:
                     desc = desc[:997] + "..."
             except Exception as e:
-                logger.error(f"Error in llama_chat: {e}")
+                logger.error(f"Error in cached_chat: {e}")
                 desc = raw_desc[:1000] + "... (AI summary failed)"
         else:
             desc = "No description."
@@ -193,11 +191,8 @@ class Anime(commands.Cog):
     )
     @app_commands.describe(name="Anime or movie name")
     async def remove_anime(self, interaction: discord.Interaction, name: str):
-        db = get_db()
         user_id = str(interaction.user.id)
-        await db.query(
-            f"DELETE user_anime WHERE user_id='{user_id}' AND (anime_title='{name}')"
-        )
+        await self.user_anime.remove_by_title(user_id, name)
         await interaction.response.send_message(
             f"Removed '{name}' from your list (if it existed).", ephemeral=True
         )
@@ -235,20 +230,20 @@ class AnimeConfirmView(discord.ui.View):
                 "This confirmation isn't for you.", ephemeral=True
             )
             return
-        db = get_db()
+        repo = UserAnimeRepo()
         # Check if anime already exists for this user
         user_id = str(self.user_id)
         anime_id = self.anime["id"]
-        check_result = await db.query(
-            f"SELECT * FROM user_anime WHERE user_id='{user_id}' AND anime_id={anime_id} LIMIT 1"
-        )
-        if check_result and check_result[0].get("result"):
+        if await repo.exists(user_id, anime_id):
             await interaction.response.send_message(
                 "This anime is already in your list!", ephemeral=True
             )
             return
-        await db.query(
-            f"CREATE user_anime SET user_id='{self.user_id}', anime_id={self.anime['id']}, anime_title={repr(self.anime['title']['english'] or self.anime['title']['romaji'])}, anime_type='{self.anime['type']}', added_at='{datetime.utcnow().isoformat()}'"
+        await repo.add(
+            user_id,
+            anime_id,
+            self.anime["title"]["english"] or self.anime["title"]["romaji"],
+            self.anime["type"],
         )
         await interaction.response.edit_message(
             content="Anime added to your list!", view=None
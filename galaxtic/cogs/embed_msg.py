@@ -1,8 +1,8 @@
 from discord.ext.commands import Cog
 from discord import app_commands
-from galaxtic.db import get_db
+from galaxtic.db import GuildRepo
 from galaxtic import settings, logger
-from surrealdb import RecordID
+import copy
 import discord
 from typing import Dict, Tuple, List
 from discord.ui import Modal, TextInput
@@ -69,16 +69,16 @@ class EmbedSectionModal(Modal):
         section: str,
         name: str,
         current_data: dict,
-        db,
-        rec,
+        guilds: GuildRepo,
+        guild_id: int,
         chooser_view: "SectionChooserView",
         org_msg,
     ):
         super().__init__(title=f"Edit {section.title()}: {name}")
         self.section = section
         self.embed_name = name
-        self.db = db
-        self.rec = rec
+        self.guilds = guilds
+        self.guild_id = guild_id
         self.current = current_data
         self.chooser_view = chooser_view
         self.org_msg = org_msg
@@ -260,8 +260,8 @@ class EmbedSectionModal(Modal):
                 # if user cleared all, remove key
                 self.current.pop("fields", None)
 
-        await self.db.patch(
-            self.rec,
+        await self.guilds.patch(
+            self.guild_id,
             [
                 {
                     "op": "replace",
@@ -276,12 +276,14 @@ class EmbedSectionModal(Modal):
 
 
 class SectionChooserView(discord.ui.View):
-    def __init__(self, embed_name: str, embed_data: dict, db, rec):
+    def __init__(
+        self, embed_name: str, embed_data: dict, guilds: GuildRepo, guild_id: int
+    ):
         super().__init__(timeout=300)
         self.embed_name = embed_name
         self.embed_data = embed_data
-        self.db = db
-        self.rec = rec
+        self.guilds = guilds
+        self.guild_id = guild_id
         self.msg = None
 
         for label, section in [
@@ -333,8 +335,8 @@ class SectionChooserView(discord.ui.View):
                     self.section,
                     view.embed_name,
                     view.embed_data,
-                    view.db,
-                    view.rec,
+                    view.guilds,
+                    view.guild_id,
                     chooser_view=view,
                     org_msg=view.msg,
                 )
@@ -351,28 +353,26 @@ class EmbedMsg(Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.guilds = GuildRepo()
 
     @embed.command(name="create", description="Create an embed entity.")
     async def create_embed(self, interaction: discord.Interaction, name: str):
-        db = get_db()
-        is_exists = await db.select(RecordID("guilds", interaction.guild.id))
+        is_exists = await self.guilds.get(interaction.guild.id)
         if not is_exists:
-            await db.create(
-                RecordID("guilds", interaction.guild.id), {"embeds": {name: {}}}
-            )
+            await self.guilds.create(interaction.guild.id, {"embeds": {name: {}}})
             logger.info(
                 f"Created guild data for {interaction.guild.name} with empty embeds."
             )
         else:
             logger.info(f"Creating embed {name} for guild {interaction.guild.name}.")
-            embeds = is_exists.get("embeds", {})
+            embeds = dict(is_exists.get("embeds", {}))
             if name in embeds:
                 await interaction.response.send_message(
                     f"Embed with name `{name}` already exists.", ephemeral=True
                 )
                 return
             embeds[name] = {}
-            await db.merge(RecordID("guilds", interaction.guild.id), {"embeds": embeds})
+            await self.guilds.merge(interaction.guild.id, {"embeds": embeds})
         await interaction.response.send_message(
             f"Embed `{name}` created successfully.", ephemeral=True
         )
@@ -381,10 +381,8 @@ class EmbedMsg(Cog):
     async def list_embeds(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        db = get_db()
-        rec = RecordID("guilds", interaction.guild.id)
-        embeds = (await db.query("SELECT VALUE embeds FROM $ref", {"ref": rec}))[0]
-        
+        embeds = await self.guilds.embeds(interaction.guild.id)
+
         if not embeds:
             await interaction.followup.send(
                 "No embeds found for this server.", ephemeral=True
@@ -404,10 +402,7 @@ class EmbedMsg(Cog):
     async def edit_embed(self, interaction: discord.Interaction, name: str):
         await interaction.response.defer()
 
-        db = get_db()
-        rec = RecordID("guilds", interaction.guild.id)
-
-        embeds = (await db.query("SELECT VALUE embeds FROM $ref", {"ref": rec}))[0]
+        embeds = await self.guilds.embeds(interaction.guild.id)
 
         if name not in embeds:
             await interaction.followup.send(
@@ -415,8 +410,9 @@ class EmbedMsg(Cog):
             )
             return
 
-        data = embeds[name]
-        view = SectionChooserView(name, data, db, rec)
+        # The modal edits this dict in place, keep the cached record untouched
+        data = copy.deepcopy(embeds[name])
+        view = SectionChooserView(name, data, self.guilds, interaction.guild.id)
         preview = dict_to_embed(data, interaction.user)
 
         msg = await interaction.followup.send(
@@ -429,13 +425,7 @@ class EmbedMsg(Cog):
     @embed.command(name="delete", description="Delete an embed entity.")
     async def delete_embed(self, interaction: discord.Interaction, name: str):
         await interaction.response.defer(ephemeral=True)
-        db = get_db()
-        embeds = (
-            await db.query(
-                "SELECT VALUE embeds FROM $ref",
-                {"ref": RecordID("guilds", interaction.guild.id)},
-            )
-        )[0]
+        embeds = await self.guilds.embeds(interaction.guild.id)
         if not embeds:
             await interaction.followup.send(
                 f"No embeds found for this server.", ephemeral=True
@@ -448,9 +438,8 @@ class EmbedMsg(Cog):
             )
             return
 
-        del embeds[name]
-        await db.patch(
-            RecordID("guilds", interaction.guild.id),
+        await self.guilds.patch(
+            interaction.guild.id,
             [{"op": "remove", "path": f"/embeds/{name}"}],
         )
         await interaction.followup.send(
@@ -2,7 +2,7 @@ from typing import NamedTuple
 import discord
 from discord.ext import commands
 from discord import app_commands
-from galaxtic.db import get_db
+from galaxtic.db import CountChannelRepo
 from galaxtic import settings, logger
 import ast
 import re
@@ -15,6 +15,7 @@ class Fun(commands.Cog):
         self.bot = bot
         self._verify_task = None
         self.count_cache = []
+        self.count_channels = CountChannelRepo()
 
     @commands.command(name="modi_say", aliases=["msay"])
     @commands.has_role("Modi")
@@ -110,12 +111,10 @@ class Fun(commands.Cog):
     async def set_count_channel(
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
-        db = get_db()
         self.count_cache.append(channel.id)
         # Upsert the count channel for this guild
-        await db.query(
-            f"UPDATE count_channel SET channel_id='{channel.id}' WHERE guild_id='{interaction.guild.id}';"
-            f"IF $result = NONE THEN CREATE count_channel SET guild_id='{interaction.guild.id}', channel_id='{channel.id}'; END;"
+        await self.count_channels.set_channel(
+            str(interaction.guild.id), str(channel.id)
         )
         await interaction.response.send_message(
             f"Counting channel set to {channel.mention}.", ephemeral=True
@@ -130,13 +129,11 @@ class Fun(commands.Cog):
         ):
             return None
 
-        db = get_db()
         guild_id = str(message.guild.id)
         # Get the count channel info for this guild
-        result = await db.query(
-            f"SELECT * FROM count_channel WHERE guild_id='{guild_id}' LIMIT 1"
-        )
-        count_info = result[0]
+        count_info = await self.count_channels.get(guild_id)
+        if count_info is None:
+            return
         # Get or initialize count state
         current_count = count_info.get("current_count", 0)
         highest_count = count_info.get("highest_count", 0)
@@ -183,9 +180,7 @@ class Fun(commands.Cog):
                 f"❌ Wrong number {message.author.display_name}! The next number should be {current_count + 1}.\n\n Counting has been reset."
             )
             await message.add_reaction("❌")
-            await db.query(
-                f"UPDATE count_channel SET current_count=0, last_user=NULL WHERE guild_id='{guild_id}'"
-            )
+            await self.count_channels.reset(guild_id)
             return
         if last_user == str(message.author.id):
             await message.reply("⛔ You can't count twice in a row!")
@@ -194,8 +189,8 @@ class Fun(commands.Cog):
         # Update counts
         new_count = number
         new_high = max(highest_count, new_count)
-        await db.query(
-            f"UPDATE count_channel SET current_count={new_count}, highest_count={new_high}, last_user='{message.author.id}', last_message_id='{message.id}' WHERE guild_id='{guild_id}'"
+        await self.count_channels.record(
+            guild_id, new_count, new_high, str(message.author.id), str(message.id)
         )
         if new_count > highest_count:
             await message.add_reaction("☑️")  # :ballot_box_with_check:
@@ -220,9 +215,8 @@ class Fun(commands.Cog):
     async def verify_count_channels(self):
         """Verify all count channels' new messages when bot restarts."""
         await self.bot.wait_until_ready()  # Ensure bot is ready before verification
-        db = get_db()
         # Get all count channels
-        result = await db.query("SELECT * FROM count_channel")
+        result = await self.count_channels.all()
         logger.info(f"Verifying {len(result)} count channels")
         if not result:
             return
@@ -314,9 +308,7 @@ class Fun(commands.Cog):
                         continue
                     if number != current_count + 1:
                         # Reset count if wrong
-                        await db.query(
-                            f"UPDATE count_channel SET current_count=0, last_user=NULL WHERE guild_id='{message.guild.id}'"
-                        )
+                        await self.count_channels.reset(str(message.guild.id))
                         current_count = 0
                         last_user = None
                         logger.info(f"Reset count for channel {channel.name} to 0")
@@ -336,8 +328,12 @@ class Fun(commands.Cog):
                         continue
                     # Update counts
                     new_high = max(highest_count, number)
-                    await db.query(
-                        f"UPDATE count_channel SET current_count={number}, highest_count={new_high}, last_user='{message.author.id}', last_message_id='{message.id}' WHERE guild_id='{message.guild.id}'"
+                    await self.count_channels.record(
+                        str(message.guild.id),
+                        number,
+                        new_high,
+                        str(message.author.id),
+                        str(message.id),
                     )
                     logger.info(f"Updated count for channel {channel.name} to {number}")
                     try:
@@ -369,9 +365,8 @@ class Fun(commands.Cog):
                 pass
 
     async def cog_load(self):
-        db = get_db()
         # Load count channels into cache
-        result = await db.query("SELECT channel_id FROM count_channel")
+        result = await self.count_channels.all()
         self.count_cache = [
             int(row["channel_id"]) for row in result if "channel_id" in row
         ]
@@ -1,14 +1,14 @@
 import discord
 from discord import app_commands
 from discord.ext.commands import Cog
-from galaxtic.db import get_db
+from galaxtic.db import GuildRepo
 from galaxtic import settings, logger
-from surrealdb import RecordID
 
 
 class Media(Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.guilds = GuildRepo()
 
     @app_commands.command(
         name="set_media_channel", description="Set the media channel for the server."
@@ -20,19 +20,16 @@ class Media(Cog):
     ):
         guild = interaction.guild
 
-        db = get_db()
-        is_exists = await db.select(RecordID("guilds", guild.id))
+        is_exists = await self.guilds.get(guild.id)
         if not is_exists:
-            await db.create(
-                RecordID("guilds", guild.id), {"media_channel_id": channel.id}
-            )
+            await self.guilds.create(guild.id, {"media_channel_id": channel.id})
             logger.info(
                 f"Created guild data for {guild.name} with media channel {channel.name}"
             )
         else:
             logger.info(f"Updated media channel for {guild.name} to {channel.name}")
-            await db.merge(
-                "guilds:" + str(guild.id),
+            await self.guilds.merge(
+                guild.id,
                 {
                     "media_channel_id": channel.id,
                 },
@@ -95,10 +92,8 @@ class Media(Cog):
         return None
 
     async def is_media_channel(self, channel: discord.TextChannel) -> bool:
-        db = get_db()
         logger.info(f"Checking if {channel.name} is a media channel.")
-        _id = RecordID("guilds", channel.guild.id)
-        result = await db.select(_id)
+        result = await self.guilds.get(channel.guild.id)
         if not result:
             logger.info(f"No guild data found for {channel.guild.name}.")
             return False
@@ -1,9 +1,14 @@
 from discord.ext.commands import Cog, command
-from galaxtic import settings
+from galaxtic import logger, settings
 import asyncio
+import re
+import time
+import aiohttp
 import yt_dlp
 import discord
 from collections import deque
+from itertools import islice
+from typing import Callable, Optional
 from urllib.parse import quote_plus
 
 
@@ -23,8 +28,16 @@ ffmpeg_options = {
     "options": "-vn -c:a libopus -b:a 384k -vbr on",
 }
 
+search_opts = {
+    **{k: v for k, v in yt_dlp_opts.items() if k != "noplaylist"},
+    "playlistend": 1,
+}
+
 ytdl = yt_dlp.YoutubeDL(yt_dlp_opts)
 
+# googlevideo stream URLs carry their expiry as ?expire=<unix time> (or /expire/<t>/)
+_EXPIRE = re.compile(r"[?&/]expire[=/](\d+)")
+
 
 class YTDLSource(discord.PCMVolumeTransformer):
     def __init__(self, source, *, data, volume=0.5):
@@ -62,16 +75,229 @@ def _extract(query, ydl_opts):
 
 
 class SongData:
-    def __init__(self, audio_url: str, title: str, thumbnail: str, duration: str):
+    def __init__(
+        self,
+        audio_url: Optional[str],
+        title: str,
+        thumbnail: Optional[str],
+        duration: str,
+        *,
+        query: Optional[str] = None,
+        webpage_url: Optional[str] = None,
+        length: Optional[float] = None,
+    ):
         self.audio_url = audio_url
         self.title = title
         self.thumbnail = thumbnail
         self.duration = duration
+        self.query = query
+        self.webpage_url = webpage_url
+        self.length = length
+        # "Added to queue" message to fill in with the title once resolved
+        self.announcement: Optional[discord.Message] = None
+
+    def update(self, info: dict) -> None:
+        self.audio_url = info["url"]
+        self.title = info.get("title", "Unknown Title")
+        self.thumbnail = info.get("thumbnail", None)
+        self.duration = info.get("duration_string", "Unknown Duration")
+        self.webpage_url = info.get("webpage_url") or self.webpage_url
+        self.length = info.get("duration")
+
+    def expires_at(self) -> Optional[float]:
+        match = _EXPIRE.search(self.audio_url or "")
+        return float(match.group(1)) if match else None
+
+
+async def resolve_song(song: SongData) -> None:
+    """Fill in the stream URL and details of ``song`` with a fresh extraction."""
+    if song.webpage_url:
+        # Re-resolving a known video skips the search
+        info = await search_ytdlp_async(song.webpage_url, yt_dlp_opts)
+    else:
+        query = f"https://music.youtube.com/search?q={quote_plus(song.query)}"
+        results = await search_ytdlp_async(query, search_opts)
+        tracks = results.get("entries") or []
+        if not tracks:
+            raise LookupError(f"No results found for {song.query}")
+        info = tracks[0]
+    song.update(info)
+
+
+class Prefetcher:
+    """
+    Keeps the next tracks of one guild's queue ready to play.
+
+    The first ``depth`` queued tracks are resolved in the background and
+    their stream URLs checked; a URL that would expire within ``margin``
+    seconds of the track finishing is resolved again. ``lead`` seconds
+    before the current track ends the FFmpeg source of the next one is
+    started, so it takes over without a gap. ``on_resolved`` is called with
+    every track that got a working stream URL.
+    """
+
+    def __init__(
+        self,
+        queue: deque,
+        session: aiohttp.ClientSession,
+        *,
+        depth: int = 2,
+        margin: float = 300.0,
+        lead: float = 15.0,
+        on_resolved: Optional[Callable[[SongData], None]] = None,
+    ):
+        self.queue = queue
+        self.session = session
+        self.depth = depth
+        self.margin = margin
+        self.lead = lead
+        self.on_resolved = on_resolved
+        self._tasks: dict[SongData, asyncio.Task] = {}
+        self._prebuilt: Optional[tuple[SongData, discord.FFmpegOpusAudio]] = None
+        self._prebuild_task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def fresh(self, song: SongData) -> bool:
+        """Whether the stream URL of ``song`` will last until it has finished playing."""
+        if song.audio_url is None:
+            return False
+        expires = song.expires_at()
+        if expires is None:
+            return True
+        return expires - time.time() > self.margin + (song.length or 0)
+
+    def kick(self) -> None:
+        """Start resolving the first ``depth`` queued tracks that need it."""
+        for song in islice(self.queue, self.depth):
+            if song not in self._tasks and not self.fresh(song):
+                task = asyncio.create_task(self._prefetch(song))
+                self._tasks[song] = task
+                task.add_done_callback(lambda _, song=song: self._tasks.pop(song, None))
+
+    async def ready(self, song: SongData) -> None:
+        """Wait until ``song`` has a fresh, working stream URL."""
+        task = self._tasks.get(song)
+        if task is not None:
+            await asyncio.shield(task)
+        if not self.fresh(song):
+            # Not prefetched, failed in the background, or expired meanwhile
+            await self._resolve(song)
+
+    async def _prefetch(self, song: SongData) -> None:
+        try:
+            await self._resolve(song)
+        except Exception as e:
+            logger.warning(f"Prefetching {song.title} failed: {e}")
+
+    async def _resolve(self, song: SongData) -> None:
+        for _ in range(2):
+            await resolve_song(song)
+            if await self._playable(song.audio_url):
+                if self.on_resolved is not None:
+                    self.on_resolved(song)
+                return
+            logger.warning(f"Stream URL of {song.title} did not respond, resolving again")
+        song.audio_url = None
+        raise LookupError(f"No playable stream for {song.title}")
+
+    async def _playable(self, url: str) -> bool:
+        try:
+            async with self.session.get(url, headers={"Range": "bytes=0-0"}) as resp:
+                return resp.status in (200, 206)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    def prebuild_after(
+        self, delay: float, upcoming: Callable[[], Optional[SongData]]
+    ) -> None:
+        """After ``delay`` seconds, start the source of whatever ``upcoming()`` returns then."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(
+            max(0.0, delay), self._start_prebuild, upcoming
+        )
+
+    def _start_prebuild(self, upcoming: Callable[[], Optional[SongData]]) -> None:
+        self._timer = None
+        if self._prebuild_task is None or self._prebuild_task.done():
+            self._prebuild_task = asyncio.create_task(self._prebuild(upcoming))
+
+    async def _prebuild(self, upcoming: Callable[[], Optional[SongData]]) -> None:
+        song = upcoming()
+        if song is None:
+            return
+        try:
+            await self.ready(song)
+        except Exception as e:
+            logger.warning(f"Could not prepare {song.title}: {e}")
+            return
+        if upcoming() is not song:
+            return
+        self._discard_prebuilt()
+        self._prebuilt = (
+            song,
+            discord.FFmpegOpusAudio(song.audio_url, **ffmpeg_options, executable="ffmpeg"),
+        )
+
+    def take_source(self, song: SongData) -> Optional[discord.FFmpegOpusAudio]:
+        """The prebuilt source of ``song``, if there is a usable one."""
+        prebuilt, self._prebuilt = self._prebuilt, None
+        if prebuilt is not None and prebuilt[0] is song and self.fresh(song):
+            return prebuilt[1]
+        if prebuilt is not None:
+            prebuilt[1].cleanup()
+        return None
+
+    def _discard_prebuilt(self) -> None:
+        if self._prebuilt is not None:
+            self._prebuilt[1].cleanup()
+            self._prebuilt = None
+
+    def clear(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for task in [*self._tasks.values(), self._prebuild_task]:
+            if task is not None:
+                task.cancel()
+        self._tasks.clear()
+        self._discard_prebuilt()
 
 
 class Music(Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.prefetchers: dict[str, Prefetcher] = {}
+        # Guilds whose next track is being prepared before it starts playing
+        self._starting: set[str] = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+
+    def prefetcher(self, guild_id: str) -> Prefetcher:
+        prefetcher = self.prefetchers.get(guild_id)
+        if prefetcher is None:
+            prefetcher = self.prefetchers[guild_id] = Prefetcher(
+                SONGS_QUEUE[guild_id],
+                self.session,
+                depth=settings.MUSIC.PREFETCH_TRACKS,
+                margin=settings.MUSIC.URL_EXPIRY_MARGIN,
+                lead=settings.MUSIC.PREBUILD_LEAD,
+                on_resolved=self.announce,
+            )
+        return prefetcher
+
+    def announce(self, song: SongData) -> None:
+        """Show the title of a queued track once it is known."""
+        msg, song.announcement = song.announcement, None
+        if msg is not None:
+            asyncio.create_task(msg.edit(content=f"Added to queue: **{song.title}**"))
 
     @command(name="join", help="Tells the bot to join the voice channel")
     async def join(self, ctx):
@@ -105,35 +331,23 @@ class Music(Cog):
         elif voice_client.channel != voice_channel:
             await voice_client.move_to(voice_channel)
 
-        query = f"https://music.youtube.com/search?q={quote_plus(song_query)}"
-        search_opts = yt_dlp_opts.copy()
-        search_opts.pop("noplaylist", None)
-        search_opts.update(
-            {
-                "playlistend": 1,
-            }
-        )
-
-        results = await search_ytdlp_async(query, search_opts)
-        tracks = results.get("entries", [])
-        if tracks is None:
-            await msg.edit("No results found for your query.")
-            return
-
-        first_track = tracks[0]
-        audio_url = first_track["url"]
-        title = first_track.get("title", "Unknown Title")
-        thumbnail = first_track.get("thumbnail", None)
-        duration = first_track.get("duration_string", "Unknown Duration")
-
         guild_id = str(ctx.guild.id)
         if SONGS_QUEUE.get(guild_id) is None:
             SONGS_QUEUE[guild_id] = deque()
 
-        SONGS_QUEUE[guild_id].append(SongData(audio_url, title, thumbnail, duration))
+        # Resolved in the background by the prefetcher (or when it is up next)
+        song = SongData(None, song_query, None, "Unknown Duration", query=song_query)
+        SONGS_QUEUE[guild_id].append(song)
+        self.prefetcher(guild_id).kick()
 
-        if voice_client.is_playing() or voice_client.is_paused():
-            await msg.edit(content=f"Added to queue: {title}")
+        if (
+            voice_client.is_playing()
+            or voice_client.is_paused()
+            or guild_id in self._starting
+        ):
+            # Edited again with the title by announce()
+            song.announcement = msg
+            await msg.edit(content=f"Added to queue: **{song_query}**")
         else:
             await self.play_next_song(voice_client, guild_id, ctx.channel)
 
@@ -201,6 +415,9 @@ class Music(Cog):
             SONGS_QUEUE[guild_id].clear()
 
         LOOP_TRACK.pop(guild_id, None)
+        prefetcher = self.prefetchers.pop(guild_id, None)
+        if prefetcher is not None:
+            prefetcher.clear()
 
         if voice_client.is_playing() or voice_client.is_paused():
             voice_client.stop()
@@ -209,40 +426,90 @@ class Music(Cog):
 
         await ctx.send("Playback stopped and I have left the voice channel.")
 
+    def stopped(self, guild_id: str, prefetcher: Prefetcher) -> bool:
+        """Whether !stop ran since ``prefetcher`` was handed out."""
+        return self.prefetchers.get(guild_id) is not prefetcher
+
     async def play_next_song(self, voice_client, guild_id, channel):
-        if SONGS_QUEUE[guild_id]:
-            song_data = SONGS_QUEUE[guild_id].popleft()
-            source = discord.FFmpegOpusAudio(
-                song_data.audio_url, **ffmpeg_options, executable="ffmpeg"
-            )
+        queue = SONGS_QUEUE[guild_id]
+        prefetcher = self.prefetcher(guild_id)
+        self._starting.add(guild_id)
+        try:
+            while queue:
+                song_data = queue.popleft()
+                try:
+                    await prefetcher.ready(song_data)
+                except asyncio.CancelledError:
+                    # !stop cancels the prefetch this was waiting on
+                    if asyncio.current_task().cancelling() or not self.stopped(
+                        guild_id, prefetcher
+                    ):
+                        raise
+                    return
+                except Exception as e:
+                    if self.stopped(guild_id, prefetcher):
+                        return
+                    logger.warning(f"Could not play {song_data.title}: {e}")
+                    await channel.send(f"Could not play **{song_data.title}**, skipping it.")
+                    continue
+                if self.stopped(guild_id, prefetcher):
+                    return
+                break
+            else:
+                self.prefetchers.pop(guild_id, None)
+                prefetcher.clear()
+                await voice_client.disconnect()
+                queue.clear()
+                return
+        finally:
+            self._starting.discard(guild_id)
 
-            def after_play(error):
-                if error:
-                    print(f"Error occurred while playing audio: {error}")
+        # Started ahead of time by the prefetcher when possible
+        source = prefetcher.take_source(song_data) or discord.FFmpegOpusAudio(
+            song_data.audio_url, **ffmpeg_options, executable="ffmpeg"
+        )
 
-                print(LOOP_TRACK.get(guild_id))
+        def after_play(error):
+            if error:
+                print(f"Error occurred while playing audio: {error}")
 
-                if LOOP_TRACK.get(guild_id):
-                    SONGS_QUEUE[guild_id].appendleft(song_data)
+            print(LOOP_TRACK.get(guild_id))
 
-                asyncio.run_coroutine_threadsafe(
-                    self.play_next_song(voice_client, guild_id, channel), self.bot.loop
-                )
+            if LOOP_TRACK.get(guild_id):
+                SONGS_QUEUE[guild_id].appendleft(song_data)
 
-            voice_client.play(source, after=after_play)
-            embed = discord.Embed(
-                title="Now Playing",
-                description=song_data.title,
-                color=discord.Color.blue(),
+            asyncio.run_coroutine_threadsafe(
+                self.play_next_song(voice_client, guild_id, channel), self.bot.loop
             )
-            # If thumbnail is available, set it
-            if song_data.thumbnail:
-                embed.set_thumbnail(url=song_data.thumbnail)
 
-            asyncio.create_task(channel.send(embed=embed))
-        else:
-            await voice_client.disconnect()
-            SONGS_QUEUE[guild_id] = deque()
+        voice_client.play(source, after=after_play)
+        embed = discord.Embed(
+            title="Now Playing",
+            description=song_data.title,
+            color=discord.Color.blue(),
+        )
+        # If thumbnail is available, set it
+        if song_data.thumbnail:
+            embed.set_thumbnail(url=song_data.thumbnail)
+
+        asyncio.create_task(channel.send(embed=embed))
+
+        prefetcher.kick()
+        if song_data.length:
+
+            def upcoming() -> Optional[SongData]:
+                if LOOP_TRACK.get(guild_id):
+                    return song_data
+                return queue[0] if queue else None
+
+            prefetcher.prebuild_after(song_data.length - prefetcher.lead, upcoming)
+
+    async def cog_unload(self):
+        for prefetcher in self.prefetchers.values():
+            prefetcher.clear()
+        self.prefetchers.clear()
+        if self._session is not None:
+            await self._session.close()
 
 
 async def setup(bot):
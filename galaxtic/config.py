@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
@@ -18,6 +18,19 @@ class SurrealDBConfig(BaseModel):
     PASSWORD: str
     NS: str
     DB: str
+    BACKEND: Literal["surrealdb", "memory"] = "surrealdb"
+    MEMORY_LATENCY_MS: float = 0.0
+    POOL_MIN_SIZE: int = 1
+    POOL_MAX_SIZE: int = 4
+    HEALTH_CHECK_INTERVAL: float = 30.0
+    ACQUIRE_TIMEOUT: float = 10.0
+    QUERY_TIMEOUT: float = 30.0
+    RECONNECT_MAX_BACKOFF: float = 30.0
+    WRITE_BATCH_SIZE: int = 100
+    WRITE_FLUSH_INTERVAL_MS: int = 500
+    WRITE_MAX_PENDING: int = 5000
+    CACHE_MAX_SIZE: int = 10000
+    CACHE_TTL: float = 300.0
 
 
 class SeafileConfig(BaseModel):
@@ -27,6 +40,60 @@ class SeafileConfig(BaseModel):
 
 class AIConfig(BaseModel):
     TOGETHER_API_KEY: str
+    BASE_URL: str = "https://api.together.xyz/v1"
+    MAX_CONCURRENCY: int = 16
+    TIMEOUT: float = 120.0
+    MAX_RETRIES: int = 3
+    RATE_LIMIT_RPM: float = 60
+    RATE_LIMIT_TPM: float = 100_000
+    REPLY_TOKEN_ESTIMATE: int = 512
+    CONTEXT_TOKENS: int = 8192
+    SUMMARY_CONCURRENCY: int = 4
+    HISTORY_TURNS: int = 10
+    HISTORY_MAX_CHANNELS: int = 1000
+    HISTORY_MAX_CHARS: int = 2_000_000
+    HISTORY_TOKENS: int = 1500
+    HISTORY_FOLD_TOKENS: int = 500
+    HISTORY_SUMMARY_TOKENS: int = 300
+    REPLY_DEBOUNCE_MS: int = 1500
+    REPLY_MAX_WAIT: float = 5.0
+    PREWARM_BATCH_SIZE: int = 50
+    PREWARM_CONCURRENCY: int = 4
+    RESPONSE_CACHE_PATH: Optional[Path] = Path("data/llm_cache.sqlite3")
+    RESPONSE_CACHE_SIZE: int = 1000
+    RESPONSE_CACHE_TTL: float = 7 * 24 * 3600
+    RESPONSE_CACHE_MAX_ENTRIES: int = 50000
+    TRANSCRIPT_STORE_PATH: Path = Path("data/transcripts.sqlite3")
+    TRANSCRIPT_STORE_MAX_MB: int = 256
+    RECALL_INDEX_PATH: Path = Path("data/recall.sqlite3")
+    RECALL_MAX_DOCS: int = 500_000
+    RECALL_PROMPT_TURNS: int = 3
+    IMAGE_WORKERS: int = 2
+    IMAGE_MAX_QUEUED: int = 20
+    IMAGE_USER_JOBS: int = 1
+    IMAGE_GUILD_JOBS: int = 3
+    IMAGE_MAX_VARIANTS: int = 4
+
+
+class RetentionConfig(BaseModel):
+    # Pruning of stored AI channel messages (RETENTION__*). Off by default:
+    # when enabled, rows older than MAX_AGE_DAYS or beyond the newest
+    # MAX_ROWS_PER_CHANNEL of a channel are deleted for good unless
+    # ARCHIVE_DIR is set, in which case they are first appended to gzipped
+    # JSONL files there. Set either limit to null to disable it.
+    ENABLED: bool = False
+    MAX_AGE_DAYS: Optional[int] = 90
+    MAX_ROWS_PER_CHANNEL: Optional[int] = 1000
+    BATCH_SIZE: int = 500
+    BATCH_PAUSE: float = 0.5
+    INTERVAL: float = 3600.0
+    ARCHIVE_DIR: Optional[Path] = None
+
+
+class MusicConfig(BaseModel):
+    PREFETCH_TRACKS: int = 2
+    URL_EXPIRY_MARGIN: float = 300.0
+    PREBUILD_LEAD: float = 15.0
 
 
 class Settings(BaseSettings):
@@ -38,5 +105,7 @@ class Settings(BaseSettings):
     SURREALDB: SurrealDBConfig
     SEAFILE: SeafileConfig
     AI: AIConfig
+    RETENTION: RetentionConfig = RetentionConfig()
+    MUSIC: MusicConfig = MusicConfig()
     COOKIES_FILE: Path = Path(".cookies.txt")
     
@@ -1,35 +1,40 @@
-from surrealdb import AsyncSurreal
-from galaxtic import settings
-
-__all__ = ["get_db", "setup_database"]
-
-# Global database instance - initialize it with None first
-db = None
-
-
-async def setup_database() -> None:
-    """Initialize database connection"""
-    global db
-    try:
-        db = AsyncSurreal(f"{settings.SURREALDB.URL}")
-
-        await db.signin(
-            {
-                "username": settings.SURREALDB.USERNAME,
-                "password": settings.SURREALDB.PASSWORD,
-            }
-        )
-
-        await db.use(settings.SURREALDB.NS, settings.SURREALDB.DB)
-
-        await db.query("INFO FOR DB;")
-
-    except Exception as e:
-        raise Exception(f"Failed to initialize database: {str(e)}")
-
-
-def get_db():
-    """Get database instance"""
-    if db is None:
-        raise Exception("Database not initialized")
-    return db
+from galaxtic.db.connection import get_db, setup_database, close_database, db_session
+from galaxtic.db.pool import ConnectionPool, PoolClosedError
+from galaxtic.db.batch import BatchWriter
+from galaxtic.db.cache import RecordCache
+from galaxtic.db.migrations import Migration, MIGRATIONS, apply_migrations
+from galaxtic.db.retention import RetentionPolicy, RetentionJob
+from galaxtic.db.memory import MemoryStore, MemorySurreal, UnsupportedQueryError
+from galaxtic.db.repos import (
+    AIMessageRepo,
+    AIChannelRepo,
+    CountChannelRepo,
+    UserAnimeRepo,
+    GuildRepo,
+    guild_cache,
+)
+
+__all__ = [
+    "get_db",
+    "setup_database",
+    "close_database",
+    "db_session",
+    "ConnectionPool",
+    "PoolClosedError",
+    "BatchWriter",
+    "RecordCache",
+    "Migration",
+    "MIGRATIONS",
+    "apply_migrations",
+    "RetentionPolicy",
+    "RetentionJob",
+    "MemoryStore",
+    "MemorySurreal",
+    "UnsupportedQueryError",
+    "AIMessageRepo",
+    "AIChannelRepo",
+    "CountChannelRepo",
+    "UserAnimeRepo",
+    "GuildRepo",
+    "guild_cache",
+]
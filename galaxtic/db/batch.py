@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+from galaxtic import logger
+
+__all__ = ["BatchWriter"]
+
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Write-behind buffer that hands records to ``flush`` in batches.
+
+    A batch is flushed once ``max_batch`` records are buffered or
+    ``flush_interval`` seconds after its first record arrived, whichever comes
+    first. At most ``max_pending`` records are held in memory; ``put`` waits
+    for room when the buffer is full, ``put_nowait`` drops the record instead.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list], Awaitable[Any]],
+        *,
+        max_batch: int = 100,
+        flush_interval: float = 0.5,
+        max_pending: int = 5000,
+        retries: int = 3,
+        name: str = "batch",
+    ):
+        self._flush = flush
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.name = name
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, record: Any) -> None:
+        await self._queue.put(record)
+
+    def put_nowait(self, record: Any) -> bool:
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def close(self) -> None:
+        """Flush everything still buffered and stop the writer."""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info(
+            f"{self.name} writer closed: {self.written} written in {self.batches} batches, {self.dropped} dropped"
+        )
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _write(self, batch: list) -> None:
+        delay = 0.5
+        for attempt in range(1, self.retries + 1):
+            try:
+                await self._flush(batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.error(
+                        f"{self.name} writer dropped {len(batch)} records: {e}"
+                    )
+                    break
+                logger.warning(
+                    f"{self.name} writer flush of {len(batch)} records failed, retrying: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+        self.dropped += len(batch)
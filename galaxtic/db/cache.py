@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+__all__ = ["RecordCache"]
+
+
+class RecordCache:
+    """
+    Size-bounded LRU cache with a TTL for read-through record lookups.
+
+    Missing records (``None``) are cached as well, so "no row" answers are just
+    as cheap as hits. Concurrent misses for the same key share one fetch, and
+    ``invalidate`` discards both the cached value and any fetch still in
+    flight so a write is never shadowed by an older read.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+
+        self.misses += 1
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await fetch()
+        except BaseException as e:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+            if isinstance(e, Exception):
+                fut.set_exception(e)
+                # Mark retrieved so waiter-less failures are not logged
+                fut.exception()
+            else:
+                fut.cancel()
+            raise
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+            self._store(key, value)
+        fut.set_result(value)
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value, or ``default``, without fetching."""
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
@@ -0,0 +1,97 @@
+from contextlib import asynccontextmanager
+from surrealdb import AsyncSurreal
+from galaxtic import settings, logger
+from galaxtic.db.pool import ConnectionPool
+from galaxtic.db.migrations import apply_migrations
+
+__all__ = ["get_db", "setup_database", "close_database", "db_session"]
+
+# Global connection pool - initialize it with None first
+db: ConnectionPool | None = None
+
+
+async def _connect():
+    """Open a single signed-in connection"""
+    conn = AsyncSurreal(f"{settings.SURREALDB.URL}")
+    try:
+        await conn.signin(
+            {
+                "username": settings.SURREALDB.USERNAME,
+                "password": settings.SURREALDB.PASSWORD,
+            }
+        )
+        await conn.use(settings.SURREALDB.NS, settings.SURREALDB.DB)
+    except Exception:
+        try:
+            await conn.close()
+        except Exception:
+            pass
+        raise
+    return conn
+
+
+def _connector():
+    """Pick the connection factory for the configured backend"""
+    if settings.SURREALDB.BACKEND == "memory":
+        from galaxtic.db.memory import MemoryStore, MemorySurreal
+
+        store = MemoryStore()
+        latency = settings.SURREALDB.MEMORY_LATENCY_MS / 1000
+
+        async def connect():
+            return MemorySurreal(store, latency)
+
+        logger.warning("Using the in-memory database backend, data is not persisted")
+        return connect
+    return _connect
+
+
+async def setup_database() -> None:
+    """Initialize database connection pool"""
+    global db
+    pool = None
+    try:
+        pool = ConnectionPool(
+            _connector(),
+            min_size=settings.SURREALDB.POOL_MIN_SIZE,
+            max_size=settings.SURREALDB.POOL_MAX_SIZE,
+            health_check_interval=settings.SURREALDB.HEALTH_CHECK_INTERVAL,
+            acquire_timeout=settings.SURREALDB.ACQUIRE_TIMEOUT,
+            query_timeout=settings.SURREALDB.QUERY_TIMEOUT,
+            max_backoff=settings.SURREALDB.RECONNECT_MAX_BACKOFF,
+        )
+        await pool.start()
+
+        async with pool.acquire() as conn:
+            version = await apply_migrations(conn)
+
+    except Exception as e:
+        if pool is not None:
+            await pool.close()
+        raise Exception(f"Failed to initialize database: {str(e)}")
+    db = pool
+    logger.info(
+        f"Database pool ready with {pool.size} connection(s), schema version {version}"
+    )
+
+
+async def close_database() -> None:
+    """Close every pooled connection"""
+    global db
+    if db is not None:
+        await db.close()
+        db = None
+
+
+def get_db() -> ConnectionPool:
+    """Get database instance"""
+    if db is None:
+        raise Exception("Database not initialized")
+    return db
+
+
+@asynccontextmanager
+async def db_session():
+    """Borrow a dedicated connection, e.g. for several statements in a row"""
+    async with get_db().acquire() as conn:
+        yield conn
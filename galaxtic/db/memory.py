@@ -0,0 +1,392 @@
+import asyncio
+import copy
+import uuid
+from typing import Any, Callable, Optional, Union
+from surrealdb import RecordID, Table
+from galaxtic.db import migrations
+from galaxtic.db.pool import ConnectionPool
+from galaxtic.db.repos import (
+    AIMessageRepo,
+    AIChannelRepo,
+    CountChannelRepo,
+    UserAnimeRepo,
+)
+
+__all__ = ["MemoryStore", "MemorySurreal", "UnsupportedQueryError"]
+
+Thing = Union[str, RecordID, Table]
+
+
+class UnsupportedQueryError(RuntimeError):
+    """The in-memory backend does not understand a query or patch op."""
+
+# Query text -> handler(store, vars). Only the constant queries the bot issues
+# are understood; anything else is rejected loudly rather than guessed at.
+QUERY_HANDLERS: dict[str, Callable[["MemoryStore", dict], Any]] = {}
+
+
+def handles(*queries: str):
+    def decorator(func):
+        for query in queries:
+            QUERY_HANDLERS[_normalize(query)] = func
+        return func
+
+    return decorator
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.split())
+
+
+class MemoryStore:
+    """Table name -> record id -> document, shared by every MemorySurreal."""
+
+    def __init__(self):
+        self.tables: dict[str, dict[Any, dict]] = {}
+
+    def table(self, name: str) -> dict[Any, dict]:
+        return self.tables.setdefault(name, {})
+
+    def rows(self, name: str) -> list[dict]:
+        return list(self.tables.get(name, {}).values())
+
+    def insert(self, name: str, data: dict, identifier: Any = None) -> dict:
+        if identifier is None:
+            identifier = data.get("id").id if isinstance(data.get("id"), RecordID) else None
+        if identifier is None:
+            identifier = uuid.uuid4().hex[:20]
+        table = self.table(name)
+        if identifier in table:
+            raise Exception(f"Database record `{name}:{identifier}` already exists")
+        row = copy.deepcopy(data)
+        row["id"] = RecordID(name, identifier)
+        table[identifier] = row
+        return row
+
+    def delete_where(self, name: str, predicate: Callable[[dict], bool]) -> list[dict]:
+        table = self.table(name)
+        removed = [key for key, row in table.items() if predicate(row)]
+        return [table.pop(key) for key in removed]
+
+
+def _resolve(thing: Thing) -> tuple[str, Optional[Any]]:
+    if isinstance(thing, RecordID):
+        return thing.table_name, thing.id
+    if isinstance(thing, Table):
+        return thing.table_name, None
+    if ":" in thing:
+        table, identifier = thing.split(":", 1)
+        return table, int(identifier) if identifier.isdigit() else identifier
+    return thing, None
+
+
+def _deep_merge(target: dict, data: dict) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+def _apply_patch(doc: dict, ops: list[dict]) -> None:
+    for op in ops:
+        parts = [
+            p.replace("~1", "/").replace("~0", "~")
+            for p in op["path"].lstrip("/").split("/")
+        ]
+        parent = doc
+        for part in parts[:-1]:
+            parent = parent.setdefault(part, {})
+        last = parts[-1]
+        if op["op"] in ("add", "replace"):
+            parent[last] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            parent.pop(last, None)
+        else:
+            raise UnsupportedQueryError(f"Unsupported patch op {op['op']!r}")
+
+
+class MemorySurreal:
+    """
+    In-process stand-in for an ``AsyncSurreal`` connection.
+
+    Supports the record methods and the subset of SurrealQL the bot uses,
+    with an optional per-call ``latency`` (seconds) to mimic a network hop.
+    """
+
+    def __init__(self, store: MemoryStore, latency: float = 0.0):
+        self.store = store
+        self.latency = latency
+
+    async def _tick(self) -> None:
+        await asyncio.sleep(self.latency)
+
+    async def signin(self, vars: dict) -> str:
+        return ""
+
+    async def use(self, namespace: str, database: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def query(self, query: str, vars: Optional[dict] = None):
+        await self._tick()
+        handler = QUERY_HANDLERS.get(_normalize(query))
+        if handler is None:
+            raise UnsupportedQueryError(f"MemorySurreal does not support query: {query}")
+        return copy.deepcopy(handler(self.store, vars or {}))
+
+    async def query_raw(self, query: str, params: Optional[dict] = None) -> dict:
+        statements = [s.strip() for s in query.split(";") if s.strip()]
+        if all(s.upper().startswith("DEFINE ") for s in statements):
+            # Schema is implicit in memory
+            await self._tick()
+            return {"result": [{"status": "OK", "result": None} for _ in statements]}
+        return {"result": [{"status": "OK", "result": await self.query(query, params)}]}
+
+    async def select(self, thing: Thing):
+        await self._tick()
+        table, identifier = _resolve(thing)
+        if identifier is None:
+            return copy.deepcopy(self.store.rows(table))
+        return copy.deepcopy(self.store.table(table).get(identifier))
+
+    async def create(self, thing: Thing, data: Optional[dict] = None):
+        await self._tick()
+        table, identifier = _resolve(thing)
+        return copy.deepcopy(self.store.insert(table, data or {}, identifier))
+
+    async def insert(self, table: Union[str, Table], data: Union[list[dict], dict]):
+        await self._tick()
+        name, _ = _resolve(table)
+        rows = data if isinstance(data, list) else [data]
+        return copy.deepcopy([self.store.insert(name, row) for row in rows])
+
+    async def _modify(self, thing: Thing, apply: Callable[[dict], None], upsert: bool):
+        await self._tick()
+        table, identifier = _resolve(thing)
+        if identifier is None:
+            rows = self.store.rows(table)
+        else:
+            row = self.store.table(table).get(identifier)
+            if row is None:
+                if not upsert:
+                    return None
+                row = self.store.insert(table, {}, identifier)
+            rows = [row]
+        for row in rows:
+            apply(row)
+        result = copy.deepcopy(rows)
+        return result if identifier is None else result[0]
+
+    async def update(self, thing: Thing, data: Optional[dict] = None):
+        def replace(row):
+            keep = row["id"]
+            row.clear()
+            row.update(copy.deepcopy(data or {}))
+            row["id"] = keep
+
+        return await self._modify(thing, replace, upsert=False)
+
+    async def upsert(self, thing: Thing, data: Optional[dict] = None):
+        def replace(row):
+            keep = row["id"]
+            row.clear()
+            row.update(copy.deepcopy(data or {}))
+            row["id"] = keep
+
+        return await self._modify(thing, replace, upsert=True)
+
+    async def merge(self, thing: Thing, data: Optional[dict] = None):
+        return await self._modify(
+            thing, lambda row: _deep_merge(row, data or {}), upsert=False
+        )
+
+    async def patch(self, thing: Thing, data: Optional[list[dict]] = None):
+        return await self._modify(
+            thing, lambda row: _apply_patch(row, data or []), upsert=False
+        )
+
+    async def delete(self, thing: Thing):
+        await self._tick()
+        table, identifier = _resolve(thing)
+        if identifier is None:
+            return self.store.delete_where(table, lambda row: True)
+        return self.store.table(table).pop(identifier, None)
+
+
+def _where(**fields) -> Callable[[dict], bool]:
+    return lambda row: all(row.get(k) == v for k, v in fields.items())
+
+
+def _pick(row: dict, *fields: str) -> dict:
+    return {f: row.get(f) for f in fields}
+
+
+@handles(ConnectionPool.PING)
+def _ping(store, vars):
+    return True
+
+
+@handles(migrations.APPLIED_VERSIONS)
+def _applied_versions(store, vars):
+    return [row["version"] for row in store.rows("schema_migration")]
+
+
+@handles(migrations.AI_CHANNEL_IDS)
+def _ai_channel_ids(store, vars):
+    return [_pick(row, "id", "guild_id", "channel_id") for row in store.rows("ai_channel")]
+
+
+@handles(migrations.DELETE_AI_CHANNELS)
+def _delete_ai_channels(store, vars):
+    store.delete_where("ai_channel", lambda row: row["id"] in vars["ids"])
+    return []
+
+
+def _message_fields(vars: dict) -> dict:
+    return _pick(vars, "guild_id", "channel_id", "author", "content", "timestamp")
+
+
+@handles(AIMessageRepo.CREATE)
+def _ai_message_create(store, vars):
+    return [store.insert("ai_message", _message_fields(vars))]
+
+
+@handles(AIMessageRepo.INSERT_MANY)
+def _ai_message_insert_many(store, vars):
+    return [store.insert("ai_message", row) for row in vars["rows"]]
+
+
+def _channel_messages(store, vars) -> list[dict]:
+    rows = filter(
+        _where(guild_id=vars["guild_id"], channel_id=vars["channel_id"]),
+        store.rows("ai_message"),
+    )
+    return sorted(rows, key=lambda row: row["timestamp"], reverse=True)
+
+
+@handles(AIMessageRepo.RECENT)
+def _ai_message_recent(store, vars):
+    rows = _channel_messages(store, vars)[: vars["limit"]]
+    return [_pick(row, "author", "content", "timestamp") for row in rows]
+
+
+@handles(AIMessageRepo.RECENT_BY_CHANNEL)
+def _ai_message_recent_by_channel(store, vars):
+    result = []
+    for channel in store.rows("ai_channel"):
+        if channel["channel_id"] not in vars["channel_ids"]:
+            continue
+        row = _pick(channel, "guild_id", "channel_id")
+        row["recent"] = _ai_message_recent(store, {**row, "limit": vars["limit"]})
+        result.append(row)
+    return result
+
+
+@handles(AIMessageRepo.OLDER_THAN)
+def _ai_message_older_than(store, vars):
+    rows = [
+        row
+        for row in store.rows("ai_message")
+        if row["guild_id"] == vars["guild_id"]
+        and row["channel_id"] == vars["channel_id"]
+        and row["timestamp"] < vars["cutoff"]
+    ]
+    return rows[: vars["limit"]]
+
+
+@handles(AIMessageRepo.BEYOND_LATEST)
+def _ai_message_beyond_latest(store, vars):
+    keep = vars["keep"]
+    return _channel_messages(store, vars)[keep : keep + vars["limit"]]
+
+
+@handles(AIMessageRepo.DELETE_IDS)
+def _ai_message_delete_ids(store, vars):
+    store.delete_where("ai_message", lambda row: row["id"] in vars["ids"])
+    return []
+
+
+@handles(AIChannelRepo.CREATE)
+def _ai_channel_create(store, vars):
+    key = _pick(vars, "guild_id", "channel_id")
+    if any(map(_where(**key), store.rows("ai_channel"))):
+        # Mirrors the unique index error, which the SDK returns as a string
+        return "Database index `ai_channel_guild_channel` already contains this record"
+    return [store.insert("ai_channel", key)]
+
+
+@handles(AIChannelRepo.ALL)
+def _ai_channel_all(store, vars):
+    return [_pick(row, "guild_id", "channel_id") for row in store.rows("ai_channel")]
+
+
+def _count_rows(store, guild_id) -> list[dict]:
+    return list(filter(_where(guild_id=guild_id), store.rows("count_channel")))
+
+
+@handles(CountChannelRepo.SET_CHANNEL)
+def _count_set_channel(store, vars):
+    rows = _count_rows(store, vars["guild_id"])
+    if not rows:
+        return [store.insert("count_channel", _pick(vars, "guild_id", "channel_id"))]
+    for row in rows:
+        row["channel_id"] = vars["channel_id"]
+    return rows
+
+
+@handles(CountChannelRepo.GET)
+def _count_get(store, vars):
+    return _count_rows(store, vars["guild_id"])[:1]
+
+
+@handles(CountChannelRepo.ALL)
+def _count_all(store, vars):
+    return store.rows("count_channel")
+
+
+@handles(CountChannelRepo.RESET)
+def _count_reset(store, vars):
+    rows = _count_rows(store, vars["guild_id"])
+    for row in rows:
+        row.update(current_count=0, last_user=None)
+    return rows
+
+
+@handles(CountChannelRepo.RECORD)
+def _count_record(store, vars):
+    rows = _count_rows(store, vars["guild_id"])
+    fields = _pick(
+        vars, "current_count", "highest_count", "last_user", "last_message_id"
+    )
+    for row in rows:
+        row.update(fields)
+    return rows
+
+
+@handles(UserAnimeRepo.EXISTS)
+def _user_anime_exists(store, vars):
+    rows = filter(
+        _where(user_id=vars["user_id"], anime_id=vars["anime_id"]),
+        store.rows("user_anime"),
+    )
+    return [row["id"] for row in rows][:1]
+
+
+@handles(UserAnimeRepo.CREATE)
+def _user_anime_create(store, vars):
+    fields = _pick(
+        vars, "user_id", "anime_id", "anime_title", "anime_type", "added_at"
+    )
+    return [store.insert("user_anime", fields)]
+
+
+@handles(UserAnimeRepo.REMOVE_BY_TITLE)
+def _user_anime_remove(store, vars):
+    store.delete_where(
+        "user_anime",
+        _where(user_id=vars["user_id"], anime_title=vars["anime_title"]),
+    )
+    return []
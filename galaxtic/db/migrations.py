@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, NamedTuple, Sequence
+from surrealdb import RecordID
+from galaxtic import logger
+
+__all__ = ["Migration", "MIGRATIONS", "apply_migrations"]
+
+Step = str | Callable[[Any], Awaitable[None]]
+
+APPLIED_VERSIONS = "SELECT VALUE version FROM schema_migration"
+AI_CHANNEL_IDS = "SELECT id, guild_id, channel_id FROM ai_channel"
+DELETE_AI_CHANNELS = "DELETE ai_channel WHERE id IN $ids"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    steps: Sequence[Step]
+
+
+async def _dedupe_ai_channels(conn) -> None:
+    """Drop duplicate ai_channel rows so the unique index can be built."""
+    rows = await conn.query(AI_CHANNEL_IDS)
+    seen = set()
+    dupes = []
+    for row in rows or []:
+        key = (str(row["guild_id"]), str(row["channel_id"]))
+        if key in seen:
+            dupes.append(row["id"])
+        else:
+            seen.add(key)
+    if dupes:
+        logger.info(f"Removing {len(dupes)} duplicate ai_channel rows")
+        await conn.query(DELETE_AI_CHANNELS, {"ids": dupes})
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        1,
+        "define tables",
+        [
+            """
+            DEFINE TABLE IF NOT EXISTS schema_migration SCHEMALESS;
+            DEFINE TABLE IF NOT EXISTS bot_info SCHEMALESS;
+            DEFINE TABLE IF NOT EXISTS guilds SCHEMALESS;
+            DEFINE TABLE IF NOT EXISTS ai_channel SCHEMALESS;
+            DEFINE TABLE IF NOT EXISTS ai_message SCHEMALESS;
+            DEFINE TABLE IF NOT EXISTS count_channel SCHEMALESS;
+            DEFINE TABLE IF NOT EXISTS user_anime SCHEMALESS;
+            """,
+        ],
+    ),
+    Migration(
+        2,
+        "access pattern indexes",
+        [
+            """
+            DEFINE INDEX IF NOT EXISTS ai_message_channel_time ON TABLE ai_message
+                FIELDS guild_id, channel_id, timestamp;
+            DEFINE INDEX IF NOT EXISTS user_anime_user_anime ON TABLE user_anime
+                FIELDS user_id, anime_id;
+            DEFINE INDEX IF NOT EXISTS user_anime_user_title ON TABLE user_anime
+                FIELDS user_id, anime_title;
+            DEFINE INDEX IF NOT EXISTS count_channel_guild ON TABLE count_channel
+                FIELDS guild_id;
+            """,
+        ],
+    ),
+    Migration(
+        3,
+        "unique ai_channel",
+        [
+            _dedupe_ai_channels,
+            """
+            DEFINE INDEX IF NOT EXISTS ai_channel_guild_channel ON TABLE ai_channel
+                FIELDS guild_id, channel_id UNIQUE;
+            """,
+        ],
+    ),
+]
+
+
+async def _run_script(conn, script: str) -> None:
+    response = await conn.query_raw(script)
+    if response.get("error") is not None:
+        raise Exception(response["error"])
+    for statement in response.get("result", []):
+        if statement.get("status") != "OK":
+            raise Exception(statement.get("result"))
+
+
+async def apply_migrations(conn, migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """
+    Apply every migration newer than the recorded schema version.
+
+    ``conn`` must be a single connection (see ``db_session``), not the pool.
+    Returns the schema version after the run.
+    """
+    applied = await conn.query(APPLIED_VERSIONS)
+    current = max(applied or [], default=0)
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+        logger.info(f"Applying migration {migration.version}: {migration.name}")
+        for step in migration.steps:
+            if isinstance(step, str):
+                await _run_script(conn, step)
+            else:
+                await step(conn)
+        await conn.create(
+            RecordID("schema_migration", migration.version),
+            {
+                "version": migration.version,
+                "name": migration.name,
+                "applied_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+        current = migration.version
+    return current
@@ -0,0 +1,275 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from galaxtic import logger
+
+__all__ = ["ConnectionPool", "PoolClosedError"]
+
+
+class PoolClosedError(Exception):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_checked")
+
+    def __init__(self, conn: Any):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_checked = self.created_at
+
+
+class ConnectionPool:
+    """
+    A pool of SurrealDB connections.
+
+    Connections are created by ``connect`` (which must return a signed-in
+    connection with the namespace/database already selected), health checked
+    in the background and replaced with exponential backoff when they break.
+
+    The pool exposes the same ``query``/``select``/``create``/... methods as a
+    single connection so it can be used anywhere ``get_db()`` was used before;
+    each call borrows a connection only for its own duration.
+    """
+
+    PING = "RETURN true;"
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Any]],
+        *,
+        min_size: int = 1,
+        max_size: int = 4,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 10.0,
+        query_timeout: float = 30.0,
+        max_backoff: float = 30.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.query_timeout = query_timeout
+        self.max_backoff = max_backoff
+
+        self._idle: list[_PooledConnection] = []
+        self._size = 0  # idle + borrowed + being opened
+        self._cond = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def start(self) -> None:
+        """Open ``min_size`` connections and start the health checker."""
+        for _ in range(self.min_size):
+            self._size += 1
+            try:
+                self._idle.append(_PooledConnection(await self._connect()))
+            except Exception:
+                self._size -= 1
+                raise
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        async with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            await self._close_conn(pooled.conn)
+
+    async def _open_with_backoff(
+        self, deadline: Optional[float] = None
+    ) -> _PooledConnection:
+        """Connect, retrying with backoff; give up with ``TimeoutError`` at ``deadline``."""
+        loop = asyncio.get_running_loop()
+        delay = 0.5
+        attempt = 1
+        while True:
+            timeout = None if deadline is None else deadline - loop.time()
+            try:
+                if timeout is not None and timeout <= 0:
+                    raise TimeoutError("Timed out connecting to the database")
+                return _PooledConnection(
+                    await asyncio.wait_for(self._connect(), timeout)
+                )
+            except Exception as e:
+                if self._closed:
+                    raise PoolClosedError("Connection pool is closed") from e
+                pause = delay + random.uniform(0, delay / 2)
+                if deadline is not None and loop.time() + pause >= deadline:
+                    raise TimeoutError(
+                        f"Could not connect to the database after {attempt} attempts: {e}"
+                    ) from e
+                logger.warning(
+                    f"Database connection attempt {attempt} failed: {e}; retrying in {pause:.1f}s"
+                )
+                await asyncio.sleep(pause)
+                delay = min(delay * 2, self.max_backoff)
+                attempt += 1
+
+    async def _get(self) -> _PooledConnection:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.acquire_timeout
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("Connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a database connection")
+                try:
+                    await asyncio.wait_for(self._cond.wait(), remaining)
+                except asyncio.TimeoutError:
+                    raise TimeoutError("Timed out waiting for a database connection")
+        try:
+            # Callers fail after ``acquire_timeout`` during an outage instead
+            # of waiting for the database to come back
+            return await self._open_with_backoff(deadline)
+        except BaseException:
+            await self._discard(None)
+            raise
+
+    async def _put(self, pooled: _PooledConnection) -> None:
+        async with self._cond:
+            if self._closed:
+                self._size -= 1
+            else:
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+        if pooled is not None:
+            await self._close_conn(pooled.conn)
+
+    async def _discard(self, pooled: Optional[_PooledConnection]) -> None:
+        async with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        if pooled is not None:
+            await self._close_conn(pooled.conn)
+
+    async def _close_conn(self, conn: Any) -> None:
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    async def _ping(self, conn: Any) -> bool:
+        try:
+            await asyncio.wait_for(conn.query(self.PING), self.query_timeout)
+            return True
+        except Exception:
+            return False
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connection for the duration of the ``async with`` block."""
+        pooled = await self._get()
+        try:
+            yield pooled.conn
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # The connection may be mid-query; pinging it would only delay
+            # the cancellation or timeout, so drop it
+            await self._discard(pooled)
+            raise
+        except BaseException:
+            # The error may have come from a dead socket rather than the query
+            # itself; only hand the connection back if it still answers.
+            if await self._ping(pooled.conn):
+                await self._put(pooled)
+            else:
+                logger.warning("Dropping broken database connection")
+                await self._discard(pooled)
+            raise
+        else:
+            await self._put(pooled)
+
+    async def _health_loop(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._check_idle()
+                await self._fill()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Database pool health check failed")
+
+    async def _check_idle(self) -> None:
+        async with self._cond:
+            to_check, self._idle = self._idle, []
+        for pooled in to_check:
+            if await self._ping(pooled.conn):
+                pooled.last_checked = time.monotonic()
+                await self._put(pooled)
+            else:
+                logger.warning("Database connection failed health check, reconnecting")
+                await self._discard(pooled)
+
+    async def _fill(self) -> None:
+        while not self._closed and self._size < self.min_size:
+            self._size += 1
+            try:
+                pooled = await self._open_with_backoff()
+            except BaseException:
+                await self._discard(None)
+                raise
+            await self._put(pooled)
+
+    async def _call(self, method: str, *args, **kwargs):
+        async with self.acquire() as conn:
+            return await asyncio.wait_for(
+                getattr(conn, method)(*args, **kwargs), self.query_timeout
+            )
+
+    async def query(self, query: str, vars: Optional[dict] = None):
+        return await self._call("query", query, vars)
+
+    async def select(self, thing):
+        return await self._call("select", thing)
+
+    async def create(self, thing, data=None):
+        return await self._call("create", thing, data)
+
+    async def update(self, thing, data=None):
+        return await self._call("update", thing, data)
+
+    async def upsert(self, thing, data=None):
+        return await self._call("upsert", thing, data)
+
+    async def merge(self, thing, data=None):
+        return await self._call("merge", thing, data)
+
+    async def patch(self, thing, data=None):
+        return await self._call("patch", thing, data)
+
+    async def delete(self, thing):
+        return await self._call("delete", thing)
+
+    async def insert(self, table, data):
+        return await self._call("insert", table, data)
@@ -0,0 +1,322 @@
+from datetime import datetime, timezone
+from typing import Any, Optional, TypedDict
+from surrealdb import RecordID
+from galaxtic import settings
+from galaxtic.db.cache import RecordCache
+from galaxtic.db.connection import get_db
+
+__all__ = [
+    "AIMessage",
+    "CountChannel",
+    "AIMessageRepo",
+    "AIChannelRepo",
+    "CountChannelRepo",
+    "UserAnimeRepo",
+    "GuildRepo",
+    "guild_cache",
+]
+
+# Shared by every GuildRepo so writes from one cog invalidate reads in another
+guild_cache = RecordCache(
+    max_size=settings.SURREALDB.CACHE_MAX_SIZE, ttl=settings.SURREALDB.CACHE_TTL
+)
+
+
+def utcnow_iso() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class AIMessage(TypedDict):
+    guild_id: str
+    channel_id: str
+    author: str
+    content: str
+    timestamp: str
+
+
+class CountChannel(TypedDict, total=False):
+    guild_id: str
+    channel_id: str
+    current_count: int
+    highest_count: int
+    last_user: Optional[str]
+    last_message_id: Optional[str]
+
+
+class _Repo:
+    """
+    Base for the repositories below.
+
+    Every query is a class-level constant with ``$vars`` bound at call time,
+    so the text sent to the server never changes and values are never
+    spliced into SurrealQL.
+    """
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_db()
+
+
+class AIMessageRepo(_Repo):
+    CREATE = (
+        "CREATE ai_message SET guild_id=$guild_id, channel_id=$channel_id, "
+        "author=$author, content=$content, timestamp=$timestamp"
+    )
+    INSERT_MANY = "INSERT INTO ai_message $rows"
+    RECENT = (
+        "SELECT author, content, timestamp FROM ai_message "
+        "WHERE guild_id=$guild_id AND channel_id=$channel_id "
+        "ORDER BY timestamp DESC LIMIT $limit"
+    )
+    RECENT_BY_CHANNEL = (
+        "SELECT guild_id, channel_id, "
+        "(SELECT author, content, timestamp FROM ai_message "
+        "WHERE guild_id=$parent.guild_id AND channel_id=$parent.channel_id "
+        "ORDER BY timestamp DESC LIMIT $limit) AS recent "
+        "FROM ai_channel WHERE channel_id IN $channel_ids"
+    )
+    OLDER_THAN = (
+        "SELECT * FROM ai_message "
+        "WHERE guild_id=$guild_id AND channel_id=$channel_id AND timestamp < $cutoff "
+        "LIMIT $limit"
+    )
+    BEYOND_LATEST = (
+        "SELECT * FROM ai_message "
+        "WHERE guild_id=$guild_id AND channel_id=$channel_id "
+        "ORDER BY timestamp DESC START $keep LIMIT $limit"
+    )
+    DELETE_IDS = "DELETE ai_message WHERE id IN $ids"
+
+    async def add(
+        self,
+        guild_id: str,
+        channel_id: str,
+        author: str,
+        content: str,
+        timestamp: str | None = None,
+    ) -> None:
+        await self.db.query(
+            self.CREATE,
+            {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+                "author": author,
+                "content": content,
+                "timestamp": timestamp or utcnow_iso(),
+            },
+        )
+
+    async def add_many(self, rows: list[AIMessage]) -> None:
+        result = await self.db.query(self.INSERT_MANY, {"rows": rows})
+        # The SDK returns a failed statement's error as a string instead of raising
+        if not isinstance(result, list):
+            raise Exception(f"Inserting {len(rows)} ai_message rows failed: {result}")
+
+    async def recent(
+        self, guild_id: str, channel_id: str, limit: int = 20
+    ) -> list[AIMessage]:
+        """Latest ``limit`` messages of a channel, newest first."""
+        result = await self.db.query(
+            self.RECENT,
+            {"guild_id": guild_id, "channel_id": channel_id, "limit": limit},
+        )
+        return result or []
+
+    async def recent_by_channel(
+        self, channel_ids: list[str], limit: int = 20
+    ) -> dict[tuple[str, str], list[AIMessage]]:
+        """Latest ``limit`` messages of each AI channel in ``channel_ids``, in one query."""
+        result = await self.db.query(
+            self.RECENT_BY_CHANNEL, {"channel_ids": channel_ids, "limit": limit}
+        )
+        return {
+            (row["guild_id"], row["channel_id"]): row.get("recent") or []
+            for row in result or []
+        }
+
+    async def older_than(
+        self, guild_id: str, channel_id: str, cutoff: str, limit: int
+    ) -> list[dict]:
+        """Up to ``limit`` rows of a channel written before ``cutoff``."""
+        result = await self.db.query(
+            self.OLDER_THAN,
+            {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+                "cutoff": cutoff,
+                "limit": limit,
+            },
+        )
+        return result or []
+
+    async def beyond_latest(
+        self, guild_id: str, channel_id: str, keep: int, limit: int
+    ) -> list[dict]:
+        """Up to ``limit`` rows of a channel past its newest ``keep`` rows."""
+        result = await self.db.query(
+            self.BEYOND_LATEST,
+            {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+                "keep": keep,
+                "limit": limit,
+            },
+        )
+        return result or []
+
+    async def delete_ids(self, ids: list[RecordID]) -> None:
+        await self.db.query(self.DELETE_IDS, {"ids": ids})
+
+
+class AIChannelRepo(_Repo):
+    CREATE = "CREATE ai_channel SET guild_id=$guild_id, channel_id=$channel_id"
+    ALL = "SELECT guild_id, channel_id FROM ai_channel"
+
+    async def add(self, guild_id: str, channel_id: str) -> bool:
+        """Register a channel; False if it was already registered."""
+        result = await self.db.query(
+            self.CREATE, {"guild_id": guild_id, "channel_id": channel_id}
+        )
+        # A unique index violation comes back as an error string, not rows
+        return isinstance(result, list)
+
+    async def all(self) -> list[tuple[str, str]]:
+        result = await self.db.query(self.ALL)
+        return [(str(row["guild_id"]), str(row["channel_id"])) for row in result or []]
+
+
+class CountChannelRepo(_Repo):
+    SET_CHANNEL = (
+        "IF (SELECT VALUE id FROM count_channel WHERE guild_id=$guild_id LIMIT 1) "
+        "{ UPDATE count_channel SET channel_id=$channel_id WHERE guild_id=$guild_id } "
+        "ELSE { CREATE count_channel SET guild_id=$guild_id, channel_id=$channel_id };"
+    )
+    GET = "SELECT * FROM count_channel WHERE guild_id=$guild_id LIMIT 1"
+    ALL = "SELECT * FROM count_channel"
+    RESET = (
+        "UPDATE count_channel SET current_count=0, last_user=NULL "
+        "WHERE guild_id=$guild_id"
+    )
+    RECORD = (
+        "UPDATE count_channel SET current_count=$current_count, "
+        "highest_count=$highest_count, last_user=$last_user, "
+        "last_message_id=$last_message_id WHERE guild_id=$guild_id"
+    )
+
+    async def set_channel(self, guild_id: str, channel_id: str) -> None:
+        await self.db.query(
+            self.SET_CHANNEL, {"guild_id": guild_id, "channel_id": channel_id}
+        )
+
+    async def get(self, guild_id: str) -> CountChannel | None:
+        result = await self.db.query(self.GET, {"guild_id": guild_id})
+        return result[0] if result else None
+
+    async def all(self) -> list[CountChannel]:
+        return await self.db.query(self.ALL) or []
+
+    async def reset(self, guild_id: str) -> None:
+        await self.db.query(self.RESET, {"guild_id": guild_id})
+
+    async def record(
+        self,
+        guild_id: str,
+        current_count: int,
+        highest_count: int,
+        last_user: str,
+        last_message_id: str,
+    ) -> None:
+        await self.db.query(
+            self.RECORD,
+            {
+                "guild_id": guild_id,
+                "current_count": current_count,
+                "highest_count": highest_count,
+                "last_user": last_user,
+                "last_message_id": last_message_id,
+            },
+        )
+
+
+class UserAnimeRepo(_Repo):
+    EXISTS = (
+        "SELECT VALUE id FROM user_anime "
+        "WHERE user_id=$user_id AND anime_id=$anime_id LIMIT 1"
+    )
+    CREATE = (
+        "CREATE user_anime SET user_id=$user_id, anime_id=$anime_id, "
+        "anime_title=$anime_title, anime_type=$anime_type, added_at=$added_at"
+    )
+    REMOVE_BY_TITLE = (
+        "DELETE user_anime WHERE user_id=$user_id AND anime_title=$anime_title"
+    )
+
+    async def exists(self, user_id: str, anime_id: int) -> bool:
+        result = await self.db.query(
+            self.EXISTS, {"user_id": user_id, "anime_id": anime_id}
+        )
+        return bool(result)
+
+    async def add(
+        self, user_id: str, anime_id: int, anime_title: str, anime_type: str
+    ) -> None:
+        await self.db.query(
+            self.CREATE,
+            {
+                "user_id": user_id,
+                "anime_id": anime_id,
+                "anime_title": anime_title,
+                "anime_type": anime_type,
+                "added_at": utcnow_iso(),
+            },
+        )
+
+    async def remove_by_title(self, user_id: str, anime_title: str) -> None:
+        await self.db.query(
+            self.REMOVE_BY_TITLE, {"user_id": user_id, "anime_title": anime_title}
+        )
+
+
+class GuildRepo(_Repo):
+    """
+    ``guilds`` records, read through ``guild_cache``.
+
+    Returned documents are shared with the cache; copy before mutating.
+    """
+
+    def __init__(self, db=None, cache: RecordCache | None = None):
+        super().__init__(db)
+        self.cache = cache if cache is not None else guild_cache
+
+    @staticmethod
+    def record_id(guild_id: int) -> RecordID:
+        return RecordID("guilds", guild_id)
+
+    async def get(self, guild_id: int) -> dict | None:
+        return await self.cache.get(
+            guild_id, lambda: self.db.select(self.record_id(guild_id))
+        )
+
+    async def create(self, guild_id: int, data: dict) -> None:
+        try:
+            await self.db.create(self.record_id(guild_id), data)
+        finally:
+            self.cache.invalidate(guild_id)
+
+    async def merge(self, guild_id: int, data: dict) -> None:
+        try:
+            await self.db.merge(self.record_id(guild_id), data)
+        finally:
+            self.cache.invalidate(guild_id)
+
+    async def patch(self, guild_id: int, ops: list[dict[str, Any]]) -> None:
+        try:
+            await self.db.patch(self.record_id(guild_id), ops)
+        finally:
+            self.cache.invalidate(guild_id)
+
+    async def embeds(self, guild_id: int) -> dict:
+        return ((await self.get(guild_id)) or {}).get("embeds") or {}
@@ -0,0 +1,151 @@
+import asyncio
+import gzip
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+from galaxtic import logger
+from galaxtic.db.repos import AIChannelRepo, AIMessageRepo
+
+if TYPE_CHECKING:
+    # The search index writes through galaxtic.db itself
+    from galaxtic.utils.search import SearchIndex
+
+__all__ = ["RetentionPolicy", "RetentionJob"]
+
+
+@dataclass
+class RetentionPolicy:
+    max_age_days: Optional[int] = 90
+    max_rows_per_channel: Optional[int] = 1000
+    batch_size: int = 500
+    batch_pause: float = 0.5
+    interval: float = 3600.0
+    archive_dir: Optional[Path] = None
+
+    @classmethod
+    def from_settings(cls, config) -> "RetentionPolicy":
+        return cls(
+            max_age_days=config.MAX_AGE_DAYS,
+            max_rows_per_channel=config.MAX_ROWS_PER_CHANNEL,
+            batch_size=config.BATCH_SIZE,
+            batch_pause=config.BATCH_PAUSE,
+            interval=config.INTERVAL,
+            archive_dir=config.ARCHIVE_DIR,
+        )
+
+
+def _archive_rows(archive_dir: Path, rows: list[dict]) -> None:
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    # Appending to a gzip file adds a new member; readers see one stream
+    with gzip.open(archive_dir / f"ai_message-{day}.jsonl.gz", "at") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str, ensure_ascii=False))
+            f.write("\n")
+
+
+class RetentionJob:
+    """
+    Background pruning of ``ai_message``.
+
+    Every ``interval`` seconds each registered AI channel is trimmed to rows
+    younger than ``max_age_days`` and to its newest ``max_rows_per_channel``
+    rows. Deletes happen in batches of ``batch_size`` with a pause between
+    them so live traffic is never blocked behind a large delete. Expired rows
+    are appended to gzipped JSONL files in ``archive_dir`` first, if set.
+    The same limits are applied to the channel's documents in ``index``.
+    """
+
+    def __init__(
+        self,
+        policy: RetentionPolicy,
+        messages: AIMessageRepo | None = None,
+        channels: AIChannelRepo | None = None,
+        index: "SearchIndex | None" = None,
+    ):
+        self.policy = policy
+        self.messages = messages or AIMessageRepo()
+        self.channels = channels or AIChannelRepo()
+        self.index = index
+        self._task: Optional[asyncio.Task] = None
+        self.deleted = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            if self.policy.archive_dir is None:
+                logger.warning(
+                    "ai_message retention is enabled without an archive directory;"
+                    " expired rows will be deleted permanently"
+                )
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                removed = await self.run_once()
+                if removed:
+                    logger.info(f"Retention removed {removed} ai_message rows")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("ai_message retention pass failed")
+            await asyncio.sleep(self.policy.interval)
+
+    async def run_once(self) -> int:
+        """Run one pass over every channel; returns the number of rows removed."""
+        removed = pruned = 0
+        cutoff = None
+        if self.policy.max_age_days is not None:
+            cutoff = (
+                datetime.now(timezone.utc) - timedelta(days=self.policy.max_age_days)
+            ).replace(tzinfo=None).isoformat()
+        for guild_id, channel_id in await self.channels.all():
+            if cutoff is not None:
+                removed += await self._drain(
+                    lambda: self.messages.older_than(
+                        guild_id, channel_id, cutoff, self.policy.batch_size
+                    )
+                )
+            if self.policy.max_rows_per_channel is not None:
+                removed += await self._drain(
+                    lambda: self.messages.beyond_latest(
+                        guild_id,
+                        channel_id,
+                        self.policy.max_rows_per_channel,
+                        self.policy.batch_size,
+                    )
+                )
+            if self.index is not None:
+                pruned += await self.index.prune(
+                    guild_id,
+                    channel_id,
+                    before=cutoff,
+                    keep=self.policy.max_rows_per_channel,
+                )
+        if pruned:
+            logger.info(f"Retention removed {pruned} search index documents")
+        self.deleted += removed
+        return removed
+
+    async def _drain(self, fetch) -> int:
+        removed = 0
+        while rows := await fetch():
+            if self.policy.archive_dir is not None:
+                await asyncio.to_thread(_archive_rows, self.policy.archive_dir, rows)
+            await self.messages.delete_ids([row["id"] for row in rows])
+            removed += len(rows)
+            if len(rows) < self.policy.batch_size:
+                break
+            await asyncio.sleep(self.policy.batch_pause)
+        return removed
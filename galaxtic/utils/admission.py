@@ -0,0 +1,197 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Hashable, Optional
+
+__all__ = ["Priority", "TokenBucket", "AdmissionController"]
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # someone is waiting on the reply
+    BACKGROUND = 1  # bulk work: long summaries, housekeeping
+
+
+class TokenBucket:
+    """Refills ``rate_per_minute`` units per minute up to one minute's worth."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+class _Waiter:
+    __slots__ = ("tokens", "future", "enqueued_at")
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class _FairQueue:
+    """Round-robin over guilds, then over users within each guild."""
+
+    def __init__(self):
+        self._guilds: OrderedDict[Hashable, OrderedDict[Hashable, deque]] = OrderedDict()
+        self.depth = 0
+
+    def push(self, guild: Hashable, user: Hashable, waiter: _Waiter) -> None:
+        users = self._guilds.setdefault(guild, OrderedDict())
+        users.setdefault(user, deque()).append(waiter)
+        self.depth += 1
+
+    def peek(self) -> Optional[_Waiter]:
+        for users in self._guilds.values():
+            for waiters in users.values():
+                return waiters[0]
+        return None
+
+    def pop(self) -> _Waiter:
+        guild, users = next(iter(self._guilds.items()))
+        user, waiters = next(iter(users.items()))
+        waiter = waiters.popleft()
+        self.depth -= 1
+        # Served guild and user go to the back of their rotations
+        if waiters:
+            users.move_to_end(user)
+        else:
+            del users[user]
+        if users:
+            self._guilds.move_to_end(guild)
+        else:
+            del self._guilds[guild]
+        return waiter
+
+    def remove(self, waiter: _Waiter) -> bool:
+        for guild, users in self._guilds.items():
+            for user, waiters in users.items():
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                    self.depth -= 1
+                    if not waiters:
+                        del users[user]
+                    if not users:
+                        del self._guilds[guild]
+                    return True
+        return False
+
+
+class AdmissionController:
+    """
+    Gatekeeper in front of the LLM API.
+
+    Each call is admitted only when the request and token budgets (per
+    minute) allow it and fewer than ``max_in_flight`` calls are running.
+    Waiting calls are served strictly by priority, and within a priority
+    round-robin across guilds and then users, so one busy guild or user
+    cannot monopolise the queue.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_in_flight: int = 16,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._queues = {priority: _FairQueue() for priority in Priority}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.admitted = {priority: 0 for priority in Priority}
+        self._waited = {priority: 0.0 for priority in Priority}
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": {p.name.lower(): q.depth for p, q in self._queues.items()},
+            "admitted": {p.name.lower(): n for p, n in self.admitted.items()},
+            "avg_wait": {
+                p.name.lower(): self._waited[p] / n if n else 0.0
+                for p, n in self.admitted.items()
+            },
+            "requests_available": round(self.requests.level, 1),
+            "tokens_available": round(self.tokens.level),
+        }
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        tokens: int,
+        priority: Priority = Priority.INTERACTIVE,
+        guild_id: Hashable = None,
+        user_id: Hashable = None,
+    ):
+        """Wait for a slot for a call of about ``tokens`` tokens and hold it."""
+        waiter = _Waiter(tokens)
+        queue = self._queues[priority]
+        queue.push(guild_id, user_id, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except BaseException:
+            granted = waiter.future.done() and not waiter.future.cancelled()
+            if not queue.remove(waiter) and granted:
+                # Admitted just as we were cancelled: give the slot back
+                self._release()
+            raise
+        self.admitted[priority] += 1
+        self._waited[priority] += time.monotonic() - waiter.enqueued_at
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self.in_flight < self.max_in_flight:
+            queue = next((q for q in self._queues.values() if q.depth), None)
+            if queue is None:
+                return
+            waiter = queue.peek()
+            if waiter.future.done():
+                # Cancelled while queued; its task is about to unwind
+                queue.pop()
+                continue
+            delay = max(
+                self.requests.wait_time(1), self.tokens.wait_time(waiter.tokens)
+            )
+            if delay > 0:
+                # Head of the highest priority queue waits; nothing may jump it
+                self._timer = asyncio.get_running_loop().call_later(
+                    delay, self._dispatch
+                )
+                return
+            queue.pop()
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self.in_flight += 1
+            waiter.future.set_result(None)
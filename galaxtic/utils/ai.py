@@ -1,24 +1,112 @@
 from galaxtic.bot import GalaxticBot
-from galaxtic import logger
-from together import Together
-from galaxtic import settings
+from galaxtic import logger, settings
+from typing import AsyncIterator, Optional
+from galaxtic.utils.admission import AdmissionController, Priority
+from galaxtic.utils.chunker import estimate_tokens
+from galaxtic.utils.llm import CHAT_MODEL, get_llm
+from galaxtic.utils.response_cache import get_response_cache, response_key
 
-together_client = Together(api_key=settings.AI.TOGETHER_API_KEY)
+CHAT_PARAMS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "top_k": 50,
+    "repetition_penalty": 1.1,
+}
 
+_admission: Optional[AdmissionController] = None
 
-async def llama_chat(bot: GalaxticBot, prompt: str) -> str:
+
+def get_admission() -> AdmissionController:
+    """Get the shared LLM admission controller"""
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController(
+            settings.AI.RATE_LIMIT_RPM,
+            settings.AI.RATE_LIMIT_TPM,
+            max_in_flight=settings.AI.MAX_CONCURRENCY,
+        )
+    return _admission
+
+
+def origin(source) -> dict:
+    """``guild_id``/``user_id`` for admission fairness from a Context, Interaction or Message."""
+    guild = getattr(source, "guild", None)
+    user = getattr(source, "author", None) or getattr(source, "user", None)
+    return {
+        "guild_id": guild.id if guild else None,
+        "user_id": user.id if user else None,
+    }
+
+
+def admit(
+    messages: list[dict[str, str]],
+    priority: Priority = Priority.INTERACTIVE,
+    guild_id=None,
+    user_id=None,
+):
+    """Hold an admission slot sized for ``messages`` plus the expected reply."""
+    tokens = sum(estimate_tokens(m["content"]) for m in messages)
+    return get_admission().admit(
+        tokens + settings.AI.REPLY_TOKEN_ESTIMATE, priority, guild_id, user_id
+    )
+
+
+async def llama_chat(
+    bot: GalaxticBot,
+    prompt: str,
+    *,
+    priority: Priority = Priority.INTERACTIVE,
+    guild_id=None,
+    user_id=None,
+) -> str:
     chat_msg = [{"role": "user", "content": prompt}]
     logger.info(f"Chat message: {chat_msg}")
-    chat_response = await bot.loop.run_in_executor(
-        None,
-        lambda: together_client.chat.completions.create(
-            model="meta-llama/Llama-3.3-70B-Instruct-Turbo-Free",
-            messages=chat_msg,
-            temperature=0.7,
-            top_p=0.9,
-            top_k=50,
-            repetition_penalty=1.1,
-        ),
-    )
+    async with admit(chat_msg, priority, guild_id, user_id):
+        chat_response = await get_llm().chat(chat_msg, CHAT_MODEL, **CHAT_PARAMS)
     logger.info(f"Chat response: {chat_response}")
-    return chat_response.choices[0].message.content.strip()
+    return chat_response
+
+
+async def llama_chat_stream(
+    bot: GalaxticBot,
+    prompt: str,
+    *,
+    priority: Priority = Priority.INTERACTIVE,
+    guild_id=None,
+    user_id=None,
+) -> AsyncIterator[str]:
+    chat_msg = [{"role": "user", "content": prompt}]
+    logger.info(f"Chat message (stream): {chat_msg}")
+    async with admit(chat_msg, priority, guild_id, user_id):
+        async for token in get_llm().chat_stream(chat_msg, CHAT_MODEL, **CHAT_PARAMS):
+            yield token
+
+
+async def cached_chat(bot: GalaxticBot, template: str, text: str, **kwargs) -> str:
+    """``llama_chat`` on ``template.format(text=text)``, answered from cache when possible."""
+    key = response_key(CHAT_MODEL, template, text, CHAT_PARAMS)
+    return await get_response_cache().get(
+        key, lambda: llama_chat(bot, template.format(text=text), **kwargs)
+    )
+
+
+async def cached_chat_stream(
+    bot: GalaxticBot, template: str, text: str, **kwargs
+) -> AsyncIterator[str]:
+    """Streaming ``cached_chat``: a hit is yielded whole, a miss is stored once complete."""
+    cache = get_response_cache()
+    key = response_key(CHAT_MODEL, template, text, CHAT_PARAMS)
+    cached = await cache.lookup(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    async for token in llama_chat_stream(bot, template.format(text=text), **kwargs):
+        parts.append(token)
+        yield token
+    # Only reached once the stream finished; an error or a consumer that
+    # stopped early leaves it uncached. An empty turn would be served until
+    # it expires, so it is not stored either.
+    response = "".join(parts).strip()
+    if response:
+        await cache.store(key, response)
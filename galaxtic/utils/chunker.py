@@ -0,0 +1,204 @@
+import re
+
+__all__ = ["estimate_tokens", "chunk_text", "split_message"]
+
+DISCORD_LIMIT = 2000
+
+_WORD = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap estimate of the LLM token count of ``text``.
+
+    BPE tokenizers average roughly four characters per token on English
+    prose, but punctuation-heavy or non-Latin text splits into more tokens,
+    so take whichever of the character and word/punctuation counts is larger.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, round(len(_WORD.findall(text)) * 1.1)) + 1
+
+
+def _split_words(text: str, max_tokens: int) -> list[str]:
+    pieces, current = [], []
+    # Running character and word counts of " ".join(current), which is all
+    # estimate_tokens needs, so each word costs the same however long the run
+    chars = words = 0
+    for word in text.split():
+        n = len(_WORD.findall(word))
+        estimate = max((chars + 1 + len(word)) // 4, round((words + n) * 1.1)) + 1
+        if current and estimate > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+            chars = words = 0
+        if estimate_tokens(word) > max_tokens:
+            # A single unbroken "word" (URL, base64...) larger than a chunk
+            step = max_tokens * 4
+            pieces.extend(word[i : i + step] for i in range(0, len(word), step))
+            continue
+        chars += len(word) + 1 if current else len(word)
+        words += n
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _units(text: str, max_tokens: int) -> list[tuple[str, str]]:
+    """Break ``text`` into (separator, piece) units that each fit a chunk."""
+    units = []
+    for paragraph in _PARAGRAPH.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(("\n\n", paragraph))
+            continue
+        sep = "\n\n"
+        for sentence in _SENTENCE.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append((sep, sentence))
+            else:
+                for word_chunk in _split_words(sentence, max_tokens):
+                    units.append((sep, word_chunk))
+                    sep = " "
+            sep = " "
+    return units
+
+
+def chunk_text(text: str, max_tokens: int) -> list[str]:
+    """
+    Split ``text`` into chunks of at most ``max_tokens`` estimated tokens.
+
+    Chunks end on paragraph boundaries where possible, then on sentence
+    boundaries, and only fall back to splitting between words for sentences
+    that are too long on their own.
+    """
+    chunks: list[str] = []
+    current = ""
+    current_tokens = 0
+    for sep, unit in _units(text, max_tokens):
+        tokens = estimate_tokens(unit)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = "", 0
+        current = f"{current}{sep}{unit}" if current else unit
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _blocks(text: str) -> list[tuple[str, str]]:
+    """Group lines into ("text", ...) and ("code", ...) blocks."""
+    blocks: list[tuple[str, str]] = []
+    lines: list[str] = []
+    fence = None
+    for line in text.split("\n"):
+        match = _FENCE.match(line)
+        if fence is None and match:
+            if lines:
+                blocks.append(("text", "\n".join(lines)))
+            lines, fence = [line], match.group(1)
+        elif fence is not None and line.strip().startswith(fence[0] * len(fence)):
+            lines.append(line)
+            blocks.append(("code", "\n".join(lines)))
+            lines, fence = [], None
+        else:
+            lines.append(line)
+    if lines:
+        # An unterminated fence is still treated as code
+        blocks.append(("code" if fence else "text", "\n".join(lines)))
+    return blocks
+
+
+def _balanced(text: str) -> bool:
+    """Whether ``text`` closes every inline markdown span it opens."""
+    stripped = re.sub(r"`[^`]*`", "", text)
+    if stripped.count("`") % 2:
+        return False
+    for marker in ("**", "__", "~~", "||"):
+        if stripped.count(marker) % 2:
+            return False
+    return True
+
+
+def _split_line(line: str, limit: int) -> list[str]:
+    pieces = []
+    while len(line) > limit:
+        cut = -1
+        for sep in (". ", "! ", "? ", " "):
+            idx = line.rfind(sep, 0, limit)
+            while idx > 0 and not _balanced(line[: idx + 1]):
+                idx = line.rfind(sep, 0, idx)
+            if idx > 0:
+                cut = idx + len(sep)
+                break
+        if cut <= 0:
+            cut = limit
+        pieces.append(line[:cut].rstrip())
+        line = line[cut:].lstrip()
+    if line:
+        pieces.append(line)
+    return pieces
+
+
+def _split_code(block: str, limit: int) -> list[str]:
+    """
+    Split a fenced code block between lines, closing and reopening the fence.
+
+    Lines too long for a message on their own are cut into pieces.
+    """
+    lines = block.split("\n")
+    opener = lines[0]
+    fence = _FENCE.match(opener).group(1)
+    body = lines[1:-1] if lines[-1].strip().startswith(fence) else lines[1:]
+    room = limit - len(opener) - len(fence) - 2
+    pieces, current = [], []
+    for line in body:
+        for part in [line[i : i + room] for i in range(0, len(line), room)] or [""]:
+            if current and len("\n".join(current + [part])) > room:
+                pieces.append(current)
+                current = []
+            current.append(part)
+    if current or not pieces:
+        pieces.append(current)
+    return [f"{opener}\n" + "\n".join(p) + f"\n{fence}" for p in pieces]
+
+
+def split_message(text: str, limit: int = DISCORD_LIMIT) -> list[str]:
+    """
+    Split ``text`` into Discord messages of at most ``limit`` characters.
+
+    Splits prefer paragraph and line breaks, never fall inside an inline
+    markdown span, and fenced code blocks are split between lines (only
+    lines too long for a message are cut), with the fence closed and
+    reopened around each part.
+    """
+    pieces: list[str] = []
+    for kind, block in _blocks(text.strip()):
+        if len(block) <= limit:
+            pieces.append(block)
+        elif kind == "code":
+            pieces.extend(_split_code(block, limit))
+        else:
+            for line in block.split("\n"):
+                pieces.extend(_split_line(line, limit) or [""])
+
+    messages: list[str] = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}\n{piece}" if current else piece
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current.strip():
+            messages.append(current.strip())
+        current = piece
+    if current.strip():
+        messages.append(current.strip())
+    return messages
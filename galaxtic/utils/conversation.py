@@ -0,0 +1,254 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+from galaxtic import logger
+from galaxtic.utils.chunker import estimate_tokens
+
+__all__ = ["Turn", "ChannelHistory", "ConversationStore"]
+
+AI_AUTHOR = "AI"
+
+# (channel key, current summary, lines to fold in) -> new summary
+Summarize = Callable[[Hashable, str, list[str]], Awaitable[str]]
+
+
+class Turn:
+    __slots__ = ("author", "content", "line", "tokens")
+
+    def __init__(self, author: Optional[str], content: str):
+        self.author = author or AI_AUTHOR
+        self.content = content
+        self.line = f"{self.author}: {content}"
+        self.tokens = estimate_tokens(self.line)
+
+
+class ChannelHistory:
+    """
+    The recent turns of one channel in a fixed-size ring buffer.
+
+    At most ``size`` turns and ``max_tokens`` estimated tokens are kept
+    verbatim; older turns move to ``unfolded`` until they are folded into
+    ``summary``. ``prompt`` (the turns rendered one per line) is kept up to
+    date as turns are added and dropped instead of being rebuilt for every
+    reply.
+    """
+
+    __slots__ = (
+        "size",
+        "max_tokens",
+        "_turns",
+        "_start",
+        "_count",
+        "_prompt",
+        "tokens",
+        "chars",
+        "hydrated",
+        "summary",
+        "unfolded",
+    )
+
+    def __init__(self, size: int, max_tokens: int = 1500):
+        self.size = size
+        self.max_tokens = max_tokens
+        self.hydrated = False  # older turns loaded from the database
+        self._turns: list[Optional[Turn]] = [None] * size
+        self._start = 0
+        self._count = 0
+        self._prompt = ""
+        self.tokens = 0
+        self.chars = 0
+        self.summary = ""
+        self.unfolded: list[Turn] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._turns[(self._start + i) % self.size]
+
+    @property
+    def prompt(self) -> str:
+        return self._prompt
+
+    def _drop_oldest(self) -> None:
+        dropped = self._turns[self._start]
+        self._turns[self._start] = None
+        self._start = (self._start + 1) % self.size
+        self._count -= 1
+        self.tokens -= dropped.tokens
+        self._prompt = self._prompt[len(dropped.line) + 1 :]
+        # Still counted in ``chars`` until it is folded or trimmed
+        self.unfolded.append(dropped)
+
+    def append(self, author: Optional[str], content: str) -> None:
+        turn = Turn(author, content)
+        if self._count == self.size:
+            self._drop_oldest()
+        self._turns[(self._start + self._count) % self.size] = turn
+        self._count += 1
+        self.tokens += turn.tokens
+        self.chars += len(turn.line)
+        self._prompt = f"{self._prompt}\n{turn.line}" if self._prompt else turn.line
+        # The newest turn always stays, however long it is
+        while self.tokens > self.max_tokens and self._count > 1:
+            self._drop_oldest()
+
+    def unfolded_tokens(self) -> int:
+        return sum(turn.tokens for turn in self.unfolded)
+
+    def set_summary(self, summary: str, folded: int) -> None:
+        """Replace the summary with one that covers the first ``folded`` unfolded turns."""
+        self.chars += len(summary) - len(self.summary)
+        self.summary = summary
+        for turn in self.unfolded[:folded]:
+            self.chars -= len(turn.line)
+        del self.unfolded[:folded]
+
+    def trim_unfolded(self, max_tokens: int) -> None:
+        """Forget the oldest unfolded turns beyond ``max_tokens`` (e.g. while folding fails)."""
+        while self.unfolded and self.unfolded_tokens() > max_tokens:
+            self.chars -= len(self.unfolded.pop(0).line)
+
+
+class ConversationStore:
+    """
+    Chat history for every AI channel.
+
+    Each channel keeps its recent turns verbatim within ``turns`` turns and
+    ``max_tokens`` tokens. If ``summarize`` is given, turns that fall out of
+    that window are folded into a running summary in the background once
+    ``fold_tokens`` tokens of them have piled up, so older context survives
+    in about ``summary_tokens`` tokens without delaying replies.
+
+    Channels are held in LRU order and the least recently active ones are
+    dropped once there are more than ``max_channels`` of them or their text
+    exceeds ``max_chars``.
+    """
+
+    def __init__(
+        self,
+        turns: int = 10,
+        max_channels: int = 1000,
+        max_chars: int = 2_000_000,
+        *,
+        max_tokens: int = 1500,
+        summarize: Optional[Summarize] = None,
+        fold_tokens: int = 500,
+        summary_tokens: int = 300,
+    ):
+        self.turns = turns
+        self.max_channels = max_channels
+        self.max_chars = max_chars
+        self.max_tokens = max_tokens
+        self.fold_tokens = fold_tokens
+        self.summary_tokens = summary_tokens
+        self._summarize = summarize
+        self._channels: OrderedDict[Hashable, ChannelHistory] = OrderedDict()
+        self._folding: dict[Hashable, asyncio.Task] = {}
+        self.chars = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._channels
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def get(self, key: Hashable) -> Optional[ChannelHistory]:
+        history = self._channels.get(key)
+        if history is not None:
+            self._channels.move_to_end(key)
+        return history
+
+    def add(self, key: Hashable, author: Optional[str], content: str) -> ChannelHistory:
+        history = self._channels.get(key)
+        if history is None:
+            history = self._channels[key] = ChannelHistory(self.turns, self.max_tokens)
+        self._channels.move_to_end(key)
+        before = history.chars
+        history.append(author, content)
+        self.chars += history.chars - before
+        self._after_write(key, history)
+        return history
+
+    def hydrate(
+        self, key: Hashable, turns: list[tuple[Optional[str], str]]
+    ) -> ChannelHistory:
+        """Load stored ``turns`` (oldest first) ahead of any live ones."""
+        live = self._channels.get(key)
+        history = ChannelHistory(self.turns, self.max_tokens)
+        for author, content in turns:
+            history.append(author, content)
+        if live is not None:
+            for turn in live.unfolded:
+                history.append(turn.author, turn.content)
+            for turn in live:
+                history.append(turn.author, turn.content)
+            history.summary = live.summary
+            history.chars += len(live.summary)
+            self.chars -= live.chars
+        history.hydrated = True
+        self._channels[key] = history
+        self._channels.move_to_end(key)
+        self.chars += history.chars
+        self._after_write(key, history)
+        return history
+
+    def discard(self, key: Hashable) -> None:
+        history = self._channels.pop(key, None)
+        if history is not None:
+            self.chars -= history.chars
+
+    def _after_write(self, key: Hashable, history: ChannelHistory) -> None:
+        if self._summarize is None:
+            # Nothing will ever fold them in
+            self.chars -= history.chars
+            history.trim_unfolded(0)
+            self.chars += history.chars
+        elif key not in self._folding and history.unfolded_tokens() >= self.fold_tokens:
+            self._folding[key] = asyncio.create_task(self._fold(key, history))
+        self._evict()
+
+    async def _fold(self, key: Hashable, history: ChannelHistory) -> None:
+        task = asyncio.current_task()
+        try:
+            turns = list(history.unfolded)
+            try:
+                summary = await self._summarize(
+                    key, history.summary, [turn.line for turn in turns]
+                )
+            except Exception as e:
+                logger.error(f"Failed to fold conversation history of {key}: {e}")
+                summary = None
+            if self._channels.get(key) is not history:
+                return  # evicted or reloaded meanwhile
+            before = history.chars
+            if summary is None:
+                # Keep the backlog bounded until folding works again
+                history.trim_unfolded(self.fold_tokens * 4)
+            else:
+                summary = summary.strip()
+                if estimate_tokens(summary) > self.summary_tokens:
+                    summary = summary[: self.summary_tokens * 4].rsplit(" ", 1)[0]
+                history.set_summary(summary, len(turns))
+            self.chars += history.chars - before
+        finally:
+            if self._folding.get(key) is task:
+                del self._folding[key]
+
+    def _evict(self) -> None:
+        # Never evict the channel that was just written to
+        while len(self._channels) > 1 and (
+            len(self._channels) > self.max_channels or self.chars > self.max_chars
+        ):
+            key, history = self._channels.popitem(last=False)
+            self.chars -= history.chars
+            task = self._folding.pop(key, None)
+            if task is not None:
+                task.cancel()
+
+    async def close(self) -> None:
+        tasks = list(self._folding.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
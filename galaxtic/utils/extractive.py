@@ -0,0 +1,98 @@
+import math
+import re
+from collections import Counter
+from galaxtic.utils.chunker import estimate_tokens
+
+__all__ = ["split_sentences", "extract_sentences"]
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_TERM = re.compile(r"[^\W\d_]{3,}")
+
+# Auto-generated captions have no punctuation; cut them into windows instead
+MAX_SENTENCE_WORDS = 40
+WINDOW_WORDS = 25
+
+STOPWORDS = frozenset(
+    """
+    about after again all also and any are because been before being but can
+    come could did does doing don for from get going gonna got had has have her
+    here him his how into its just know like look lot make many more most much
+    not now off okay one only other our out over really right said say see she
+    should some something that the their them then there these they thing
+    things think this those through too very want was way well were what when
+    where which who why will with would yeah yes you your
+    """.split()
+)
+
+
+def split_sentences(text: str) -> list[str]:
+    """Sentences of ``text``, with unpunctuated runs cut into word windows."""
+    sentences = []
+    for sentence in _SENTENCE.split(text):
+        words = sentence.split()
+        if len(words) <= MAX_SENTENCE_WORDS:
+            if words:
+                sentences.append(" ".join(words))
+            continue
+        for i in range(0, len(words), WINDOW_WORDS):
+            sentences.append(" ".join(words[i : i + WINDOW_WORDS]))
+    return sentences
+
+
+def _terms(sentence: str) -> list[str]:
+    return [
+        term for term in _TERM.findall(sentence.lower()) if term not in STOPWORDS
+    ]
+
+
+def extract_sentences(text: str, max_tokens: int) -> str:
+    """
+    Shrink ``text`` to about ``max_tokens`` tokens of its most informative sentences.
+
+    Every sentence is weighted by TF-IDF and scored by cosine similarity to
+    the TF-IDF centroid of the whole text, so sentences about what the text
+    keeps coming back to win over filler and one-off tangents. The best
+    sentences are taken greedily until the budget is spent and returned in
+    their original order. Text that already fits is returned unchanged.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = split_sentences(text)
+    counts = [Counter(_terms(sentence)) for sentence in sentences]
+    df: Counter[str] = Counter()
+    for tf in counts:
+        df.update(tf.keys())
+    total = len(sentences)
+    idf = {term: math.log(total / n) + 1.0 for term, n in df.items()}
+
+    vectors = []
+    centroid: Counter[str] = Counter()
+    for tf in counts:
+        vector = {term: (1.0 + math.log(n)) * idf[term] for term, n in tf.items()}
+        vectors.append(vector)
+        centroid.update(vector)
+    centroid_norm = math.sqrt(sum(w * w for w in centroid.values())) or 1.0
+
+    scores = []
+    for vector in vectors:
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if not norm:
+            scores.append(0.0)
+            continue
+        dot = sum(w * centroid[term] for term, w in vector.items())
+        scores.append(dot / (norm * centroid_norm))
+
+    chosen: list[int] = []
+    seen: set[str] = set()
+    used = 0
+    for i in sorted(range(total), key=scores.__getitem__, reverse=True):
+        key = sentences[i].lower()
+        if key in seen:
+            continue
+        tokens = estimate_tokens(sentences[i])
+        if used + tokens > max_tokens:
+            continue  # a shorter sentence may still fit
+        seen.add(key)
+        chosen.append(i)
+        used += tokens
+    return " ".join(sentences[i] for i in sorted(chosen))
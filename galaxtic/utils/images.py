@@ -0,0 +1,152 @@
+import asyncio
+import random
+from collections import Counter
+from typing import Hashable
+from galaxtic import logger
+from galaxtic.utils.llm import get_llm
+
+__all__ = ["ImageLimitError", "ImageService"]
+
+
+class ImageLimitError(Exception):
+    """A job was refused because the queue or a user or guild limit is full."""
+
+
+class _Job:
+    __slots__ = ("prompt", "count", "guild_id", "user_id", "future")
+
+    def __init__(self, prompt: str, count: int, guild_id: Hashable, user_id: Hashable):
+        self.prompt = prompt
+        self.count = count
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class ImageService:
+    """
+    Image generation behind a bounded job queue.
+
+    ``workers`` jobs run at a time and at most ``max_queued`` more may wait;
+    each user may have ``per_user`` and each guild ``per_guild`` jobs queued
+    or running. A job generates its ``count`` variants concurrently, each
+    with its own seed, and returns the images that succeeded.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        max_queued: int = 20,
+        per_user: int = 1,
+        per_guild: int = 3,
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 4,
+    ):
+        self.workers = workers
+        self.per_user = per_user
+        self.per_guild = per_guild
+        self.params = {"width": width, "height": height, "steps": steps}
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue(max_queued)
+        self._tasks: list[asyncio.Task] = []
+        self._users: Counter = Counter()
+        self._guilds: Counter = Counter()
+
+    @property
+    def pending(self) -> int:
+        """Jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def check(self, guild_id: Hashable = None, user_id: Hashable = None) -> None:
+        """Raise ``ImageLimitError`` if a job from this user would be refused now."""
+        if user_id is not None and self._users[user_id] >= self.per_user:
+            raise ImageLimitError(
+                "You already have an image generating, please wait for it to finish."
+            )
+        if guild_id is not None and self._guilds[guild_id] >= self.per_guild:
+            raise ImageLimitError(
+                "Too many images are generating in this server, please try again shortly."
+            )
+        if self._queue.full():
+            raise ImageLimitError("The image queue is full, please try again later.")
+
+    async def generate(
+        self,
+        prompt: str,
+        count: int = 1,
+        *,
+        guild_id: Hashable = None,
+        user_id: Hashable = None,
+    ) -> list[bytes]:
+        """Queue a job for ``count`` variants of ``prompt`` and wait for the images."""
+        self.check(guild_id, user_id)
+        job = _Job(prompt, count, guild_id, user_id)
+        self._users[user_id] += 1
+        self._guilds[guild_id] += 1
+        self._queue.put_nowait(job)
+        self._start()
+        # Cancelling the caller cancels the future, so a queued job is skipped
+        return await job.future
+
+    def _start(self) -> None:
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    def _release(self, job: _Job) -> None:
+        for counter, key in ((self._users, job.user_id), (self._guilds, job.guild_id)):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done():
+                    continue
+                images = await self._run(job)
+                if not job.future.done():
+                    job.future.set_result(images)
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                if not job.future.done():
+                    job.future.cancel()  # the worker itself was cancelled
+                self._release(job)
+                self._queue.task_done()
+
+    async def _run(self, job: _Job) -> list[bytes]:
+        results = await asyncio.gather(
+            *(self._variant(job.prompt) for _ in range(job.count)),
+            return_exceptions=True,
+        )
+        images = [result for result in results if isinstance(result, bytes)]
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            logger.warning(f"{len(errors)}/{job.count} image variants failed: {errors[0]}")
+        if not images:
+            raise errors[0]
+        return images
+
+    async def _variant(self, prompt: str) -> bytes:
+        llm = get_llm()
+        urls = await llm.generate_image(
+            prompt, n=1, seed=random.randrange(2**31), **self.params
+        )
+        if not urls:
+            raise ValueError("Invalid response from image generation API")
+        return await llm.download(urls[0])
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.cancel()
+            self._release(job)
@@ -0,0 +1,256 @@
+import re
+from bisect import bisect_right
+from typing import Optional
+
+__all__ = [
+    "LANGUAGE_NAMES",
+    "NO_LANGUAGE",
+    "UNDETERMINED",
+    "detect_language",
+    "needs_translation",
+    "source_hint",
+]
+
+# ISO 639-2 codes for "no linguistic content" and "undetermined"
+NO_LANGUAGE = "zxx"
+UNDETERMINED = "und"
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "de": "German",
+    "pt": "Portuguese",
+    "it": "Italian",
+    "nl": "Dutch",
+    "tr": "Turkish",
+    "id": "Indonesian",
+    "pl": "Polish",
+    "sv": "Swedish",
+    "tl": "Tagalog",
+    "vi": "Vietnamese",
+    "ru": "Russian",
+    "uk": "Ukrainian",
+    "el": "Greek",
+    "he": "Hebrew",
+    "ar": "Arabic",
+    "fa": "Persian",
+    "hi": "Hindi",
+    "th": "Thai",
+    "ko": "Korean",
+    "ja": "Japanese",
+    "zh": "Chinese",
+}
+
+# Most frequent word trigrams (words padded with spaces) of each Latin-script
+# language, most frequent first, precomputed from sample chat text
+_PROFILES = {
+    "en": (
+        " th|ng |ing|the| yo|is |you|he |ou |thi| an| be| i | is| me| to| we|"
+        " wh| wi| wo|at |hat|ld |me |nd |tha| do| it| kn| ne|and|ay |be |ed |"
+        "hin|it |ith|kno|ll |ne |now|oul|ow |re |th |to |uld|wit| fi| fr| go|"
+        " ha| he| no| of| pl| re| wa| ye|all|as |ase|day|eas|eek|en |end|er |"
+        "ere|et |han|hel|her|his|ine|kin|lea|nk |of |oin"
+    ),
+    "es": (
+        " es|est|os | qu|do | de|or |sta|ue | la| no| sa| se| to|as |de |la |"
+        "que|tod| a | co| fu| mu| po| va|con|en |er |ien|me |na |ndo|no |odo|"
+        "on |por|va |ía | al| am| ay| bi| el| en| ha| pa| re| tu| y |aba|abe|"
+        "aci|ado|alg|ali|ana|and|ar |aví|bie|cio|da |dos|el |ema|ero|es |fun|"
+        "go |he |ion|ión|lgo|lo |man|mos|muc|nci|nec|ona"
+    ),
+    "fr": (
+        " qu|ne | la|de |is |it |la |le |que|ue | ce| es| le| to|ait|ce |ent|"
+        "est|our|ra |se |st | ai| av| be| co| de| di| me| ne| pa| pe| ré| se|"
+        " so| tu|ais|as |ave|cha|ec |er |jou|men|nt |on |out|rai|re |tou|tu |"
+        "ur |vec| au| c | ch| en| et| il| j | je| jo| ma| mo| no| on| po| pr|"
+        " sa|aim|ain|auc|bea|com|cou|eau|end|era|et |hai"
+    ),
+    "de": (
+        "en | da|as |ch |das| wi|ich|och| mi|ir |nd |st |te |wir| ni| no|abe|"
+        "ass|che|cht|ein|es |iel|nde|noc| de| du| es| ge| ha| ic| wa| we| wo|"
+        "chs|den|du |ele|hst|ht |ie |ier|ine|it |len|lle|mit|nic|nn |rt |sag|"
+        "sch|ss |ste|und|was| ab| al| di| et| is| ka| ma| ne| sa| si| sp| st|"
+        " un| vi|ag |all|ann|be |ben|ehe|end|enn|er |ers"
+    ),
+    "pt": (
+        "do | co| qu|de | de| mu| se|da |que|ue | a | sa| va|ai |ar |com|er |"
+        "ndo|nte|or |ser|te |vai|ão | di| me| no| o | on| po|as |em |ent|est|"
+        "eu |ia |isa|ma |mui|na |om |sta|uit| ac| al| e | es| eu| fa| fi| ge|"
+        " ma| nã| pr| re| su| to| vo|abe|air|alg|ana|and|bem|coi|con|cê |ema|"
+        "gen|gos|gum|ir |iss|ito|lgu|man|me |nov|não|ocê"
+    ),
+    "it": (
+        "to |on | co| tu|no | ch| il| la| pe| qu| se|che|he |il |ne |per|re |"
+        " an| fa| no| sa| si| è |con|cos|ent|er |ett|gio|ima|la |non|ora|qua|"
+        "ra |rà |sa |sta|ti |tti|tto|tut|utt|vor| ca| da| di| do| e | gi| ha|"
+        " mi| ri| st| us|ai |alc|ame|ana|anc|and|ato|avo|cir|cor|dov|ei |ess|"
+        "iam|ine|ion|ior|lco|le |lo |ma |man|men|mi |mo "
+    ),
+    "nl": (
+        "en |et | he| we|het|at | da| de| je| me| no|dat|de |is |je | ik| is|"
+        " ni| ve| wa|aar|iet|ik |nie|nog|og |ver| ie|den|der|el |end|er |ere|"
+        "ete|met|nd |nde|te |ten|we |wee| al| be| di| en| er| ge| mi| sp| ui|"
+        " va| vo| ze|ag |als|an |and|ar |dig|dit|eek|eel|een|ele|ell|erg|eri|"
+        "erk|ets|gen|heb|ig |ijn|ing|it |jn |kom|kt |le "
+    ),
+    "tr": (
+        "yor| bi| ol|er |in |oru|unu| ba| bu| ha| he| ne| ve| ya|aca|alı|bil|"
+        "bir|da |ede|en |ir |iyo|nu |ok |un |çok|ün |ın |ını|ıyo| dü| ge| gü|"
+        " ki| na| oy| so| sö| te| ça| ço| çı| şe|aft|ak |ama|ana|apı|ar |arı|"
+        "ağı|ban|bu |cağ|duğ|ece|eni|eye|eği|fta|gün|haf|her|ikl|ilm|içi|lac|"
+        "ldu|lmi|lış|miy|na |nce|nda|ni |nı |old|olu|rim"
+    ),
+    "id": (
+        "an |ya | sa|ang|ng | ba|kan| be| ka| se|aya|nya|say| me| ta| ya|aka|"
+        "ber|kam|mu |yan| ak| in| ke| te|ada|ah |ahu|aik|ak |amu|bai|ban|hu |"
+        "in |tah| ad| de| di| la| ma| pe|ala|any|apa|aru|dak|dan|ema|emb|eng|"
+        "eri|ik |ing|ini|ka |man|mem|nga|ni |uan| bi| da| ti|ain|ari|asi|atn|"
+        "bar|da |den|di |eka|elu|emu|erj|gan|har|ida|ih "
+    ),
+    "pl": (
+        "dzi|ie |wie|zie| je|jes| ni| po|cze|esz|nie| dz| wi| z |em |ied|mi |"
+        "owi|pow|ze | mi| pr| to| że|będ|pra|sz |szc|szy|to |zcz|zys|ło |że |"
+        " bę| co| i | na| od| ro| si| st| ta| w | ws| wy| za|aj |ak |apr|ać |"
+        "ało|czo|edz|ego|est|iał|iel|iem|ię |ka |li |my |nap|owa|oś |pot|prz|"
+        "raw|rem|rze|rzy|się|st |tak|wsz|wyj|ym |zeg|zor"
+    ),
+    "sv": (
+        "et | de|en |det|er |gen| at|ar |att|tt |är | me| va| ve|de |mer|var|"
+        " du| i | in| ja| ko| vi| är|ag |du |för|ing|jag|kom|la |mme|nge|omm|"
+        "ver|ör | be| di| fö| gå| he| hä| mi| nä| nå| oc| sn| sp| än|an |bba|"
+        "ch |ed |ela|got|hel|ig |ige|int|ll |lla|med|nga|nte|någ|och|ot |pel|"
+        "rin|spe|ta |te |vet|vi |äll|änd|ågo|år | al| av"
+    ),
+    "tl": (
+        "ng |ang| ma| sa| an| na|in | ka|ing| pa|ala|at |ong|sa | la|abi|an |"
+        "na | ba| ko| ku| mo|aba|aga|aki|ay |gan|ko |kun|may|mo |to |ung| ak|"
+        " ga| it|ago|aha|ama|ami|ara|bi |go |hin|ind|it |ito|lam|lin|min|ndi|"
+        "pa |sab|tin| at| ay| gu| hi| li| ng| pu|aan|aka|am |ana|ano|apa|as |"
+        "ayo|bag|bas|di |ga |gag|ggo|gin|hat|ila|kai|kin"
+    ),
+    "vi": (
+        " ch|ng |ôi | tô|tôi| bạ| th|bạn|ạn | nh| bi| kh|biế|iết|ết |ới | là|"
+        " ng| nó| sẽ| tr| tu| và|chơ|hôn|hơi|khô|sẽ |ày |ông|ơi |ại |ần |ều |"
+        " cu| có| cả| gì| họ| lạ| mọ| nà| rấ| tố| vẫ| vớ| đã| đư| đề|ay |cho|"
+        "chú|có |gì |hiề|ho |hún|hật|iều|làm|lại|mọi|nh |nhi|này|nó |rất|tuầ|"
+        "uần|và |vẫn|với|àm |âu |úng|đã |đượ|ược|ất |ẫn "
+    ),
+}
+
+# Languages that are told apart by their script alone: (first, last, code)
+_SCRIPTS = sorted(
+    [
+        (0x0370, 0x03FF, "el"),
+        (0x0400, 0x04FF, "ru"),
+        (0x0590, 0x05FF, "he"),
+        (0x0600, 0x06FF, "ar"),
+        (0x0900, 0x097F, "hi"),
+        (0x0E00, 0x0E7F, "th"),
+        (0x1100, 0x11FF, "ko"),
+        (0x3040, 0x30FF, "ja"),
+        (0x3130, 0x318F, "ko"),
+        (0x3400, 0x4DBF, "zh"),
+        (0x4E00, 0x9FFF, "zh"),
+        (0xAC00, 0xD7AF, "ko"),
+    ]
+)
+_SCRIPT_STARTS = [first for first, _, _ in _SCRIPTS]
+
+# Letters that single out a language within its script
+_UKRAINIAN = set("іїєґІЇЄҐ")
+_PERSIAN = set("پچژگ")
+
+# URLs, Discord mentions, channels, roles, custom emoji and :shortcodes:
+_NOISE = re.compile(
+    r"https?://\S+|www\.\S+|<a?:\w+:\d+>|<[@#][!&]?\d+>|<t:\d+(?::\w)?>|:\w+:"
+)
+_WORD = re.compile(r"[^\W\d_]+")
+
+MIN_LETTERS = 2
+# Below this many trigrams a Latin-script guess is too weak to act on
+MIN_TRIGRAMS = 6
+# The best language must outscore the runner-up by this factor
+MIN_MARGIN = 1.15
+
+
+def _build_index() -> dict[str, tuple[tuple[str, float], ...]]:
+    index: dict[str, list[tuple[str, float]]] = {}
+    for lang, table in _PROFILES.items():
+        grams = table.split("|")
+        for rank, gram in enumerate(grams):
+            # Rank-weighted: the most frequent trigrams count the most
+            index.setdefault(gram, []).append((lang, 1.0 - rank / (2 * len(grams))))
+    return {gram: tuple(entries) for gram, entries in index.items()}
+
+
+_INDEX = _build_index()
+
+
+def _script(char: str) -> Optional[str]:
+    point = ord(char)
+    i = bisect_right(_SCRIPT_STARTS, point) - 1
+    if i >= 0 and point <= _SCRIPTS[i][1]:
+        return _SCRIPTS[i][2]
+    return None
+
+
+def _latin_language(text: str) -> str:
+    scores = dict.fromkeys(_PROFILES, 0.0)
+    total = 0
+    for word in _WORD.findall(text.lower()):
+        word = f" {word} "
+        for i in range(len(word) - 2):
+            total += 1
+            for lang, weight in _INDEX.get(word[i : i + 3], ()):
+                scores[lang] += weight
+    if total < MIN_TRIGRAMS:
+        return UNDETERMINED
+    (best, top), (_, second) = sorted(scores.items(), key=lambda kv: -kv[1])[:2]
+    if top < total * 0.2 or top < second * MIN_MARGIN:
+        return UNDETERMINED
+    return best
+
+
+def detect_language(text: str) -> str:
+    """
+    ISO 639-1 code of the language of ``text``.
+
+    Returns ``NO_LANGUAGE`` for text without words (emoji, URLs, numbers,
+    mentions) and ``UNDETERMINED`` when the guess is too weak. Languages with
+    a script of their own are recognised by it; Latin-script text is scored
+    against the trigram profiles above.
+    """
+    text = _NOISE.sub(" ", text)
+    letters = 0
+    scripts: dict[str, int] = {}
+    for char in text:
+        if char.isalpha():
+            letters += 1
+            script = _script(char)
+            if script is not None:
+                scripts[script] = scripts.get(script, 0) + 1
+    if letters < MIN_LETTERS:
+        return NO_LANGUAGE
+    if scripts and sum(scripts.values()) * 2 >= letters:
+        # Kanji is written with Han characters too; any kana means Japanese
+        if "ja" in scripts:
+            return "ja"
+        lang = max(scripts, key=scripts.get)
+        if lang == "ru" and not _UKRAINIAN.isdisjoint(text):
+            return "uk"
+        if lang == "ar" and not _PERSIAN.isdisjoint(text):
+            return "fa"
+        return lang
+    return _latin_language(text)
+
+
+def needs_translation(lang: str, target: str = "en") -> bool:
+    """Whether text detected as ``lang`` has anything to translate to ``target``."""
+    return lang not in (NO_LANGUAGE, target)
+
+
+def source_hint(lang: str) -> str:
+    """Prompt line naming the detected source language, empty if unknown."""
+    name = LANGUAGE_NAMES.get(lang)
+    return f"The text is most likely written in {name}.\n    " if name else ""
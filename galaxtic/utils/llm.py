@@ -0,0 +1,219 @@
+import asyncio
+import json
+import random
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+import aiohttp
+from galaxtic import logger, settings
+
+__all__ = [
+    "CHAT_MODEL",
+    "IMAGE_MODEL",
+    "LLMError",
+    "InvalidRequestError",
+    "RateLimitError",
+    "LLMClient",
+    "get_llm",
+    "close_llm",
+]
+
+CHAT_MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free"
+IMAGE_MODEL = "black-forest-labs/FLUX.1-schnell-Free"
+
+
+class LLMError(Exception):
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class InvalidRequestError(LLMError):
+    """The provider rejected the request itself (4xx); retrying won't help."""
+
+
+class RateLimitError(LLMError):
+    pass
+
+
+class LLMClient:
+    """
+    Async client for an OpenAI-compatible API (Together by default).
+
+    All requests share one pooled ``aiohttp`` session, at most
+    ``max_concurrency`` requests are in flight at a time, and rate limits,
+    5xx responses and network errors are retried with jittered exponential
+    backoff.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.together.xyz/v1",
+        *,
+        max_concurrency: int = 16,
+        timeout: float = 120.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._headers = {"Authorization": f"Bearer {api_key}"}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_concurrency, keepalive_timeout=60
+                ),
+                timeout=self.timeout,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter keeps retries from many callers from lining up
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    @asynccontextmanager
+    async def _request(self, path: str, payload: dict[str, Any], timeout=None):
+        """POST with retries; yields the first successful (200) response."""
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            retry_after = None
+            async with self._semaphore:
+                try:
+                    resp = await self.session.post(
+                        url,
+                        json=payload,
+                        headers=self._headers,
+                        timeout=timeout or self.timeout,
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = LLMError(f"Request to {path} failed: {e!r}")
+                else:
+                    try:
+                        if resp.status == 200:
+                            yield resp
+                            return
+                        body = await resp.text()
+                        retry_after = resp.headers.get("Retry-After")
+                        error = _error_for(resp.status, body)
+                    finally:
+                        resp.release()
+            if isinstance(error, InvalidRequestError) or attempt >= self.max_retries:
+                raise error
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"{error}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _post(self, path: str, payload: dict[str, Any]) -> dict:
+        async with self._request(path, payload) as resp:
+            return await resp.json()
+
+    async def chat(
+        self, messages: list[dict[str, str]], model: str = CHAT_MODEL, **params
+    ) -> str:
+        data = await self._post(
+            "/chat/completions", {"model": model, "messages": messages, **params}
+        )
+        return data["choices"][0]["message"]["content"].strip()
+
+    async def chat_stream(
+        self, messages: list[dict[str, str]], model: str = CHAT_MODEL, **params
+    ) -> AsyncIterator[str]:
+        """Yield completion text as it is generated (server-sent events)."""
+        payload = {"model": model, "messages": messages, "stream": True, **params}
+        # A long generation may outlive the total timeout; bound idle reads instead
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.timeout.total)
+        async with self._request("/chat/completions", payload, timeout) as resp:
+            async for raw in resp.content:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise LLMError(str(chunk["error"]))
+                choices = chunk.get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+    async def generate_image(
+        self, prompt: str, model: str = IMAGE_MODEL, **params
+    ) -> list[str]:
+        """Generate images and return their URLs."""
+        data = await self._post(
+            "/images/generations", {"model": model, "prompt": prompt, **params}
+        )
+        return [item["url"] for item in data.get("data") or [] if item.get("url")]
+
+    async def download(self, url: str) -> bytes:
+        """Fetch a (non-API) URL over the shared session, without credentials."""
+        async with self.session.get(url) as resp:
+            if resp.status != 200:
+                raise LLMError(f"Failed to download {url}", resp.status)
+            return await resp.read()
+
+
+def _error_for(status: int, body: str) -> LLMError:
+    message = body
+    try:
+        error = json.loads(body).get("error")
+        if isinstance(error, dict):
+            message = error.get("message") or body
+        elif isinstance(error, str):
+            message = error
+    except (ValueError, AttributeError):
+        pass
+    message = f"[{status}] {message}"
+    if status == 429:
+        return RateLimitError(message, status)
+    if 400 <= status < 500 and status != 408:
+        return InvalidRequestError(message, status)
+    return LLMError(message, status)
+
+
+_client: Optional[LLMClient] = None
+
+
+def get_llm() -> LLMClient:
+    """Get the shared LLM client"""
+    global _client
+    if _client is None:
+        _client = LLMClient(
+            settings.AI.TOGETHER_API_KEY,
+            settings.AI.BASE_URL,
+            max_concurrency=settings.AI.MAX_CONCURRENCY,
+            timeout=settings.AI.TIMEOUT,
+            max_retries=settings.AI.MAX_RETRIES,
+        )
+    return _client
+
+
+async def close_llm() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
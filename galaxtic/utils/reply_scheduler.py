@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+from galaxtic import logger
+
+__all__ = ["ReplyScheduler"]
+
+
+class _Channel:
+    __slots__ = ("pending", "wake", "task")
+
+    def __init__(self):
+        self.pending: list = []
+        self.wake = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+
+class ReplyScheduler:
+    """
+    Coalesces bursts of messages per channel into single replies.
+
+    After a message arrives the scheduler waits until the channel has been
+    quiet for ``window`` seconds (but no longer than ``max_wait``) and then
+    calls ``reply`` once with everything received so far. Only one reply per
+    channel runs at a time; messages that arrive while it is generating are
+    answered together in the next one.
+    """
+
+    def __init__(
+        self,
+        reply: Callable[[Hashable, list[Any]], Awaitable[None]],
+        *,
+        window: float = 1.5,
+        max_wait: float = 5.0,
+    ):
+        self._reply = reply
+        self.window = window
+        self.max_wait = max_wait
+        self._channels: dict[Hashable, _Channel] = {}
+
+    def submit(self, key: Hashable, item: Any) -> None:
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel()
+        channel.pending.append(item)
+        channel.wake.set()
+        if channel.task is None:
+            channel.task = asyncio.create_task(self._run(key, channel))
+
+    async def _debounce(self, channel: _Channel) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while True:
+            channel.wake.clear()
+            timeout = min(self.window, deadline - loop.time())
+            if timeout <= 0:
+                return
+            try:
+                await asyncio.wait_for(channel.wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                return
+
+    async def _run(self, key: Hashable, channel: _Channel) -> None:
+        try:
+            while channel.pending:
+                await self._debounce(channel)
+                batch, channel.pending = channel.pending, []
+                try:
+                    await self._reply(key, batch)
+                except Exception:
+                    logger.exception(f"Reply for channel {key} failed")
+        finally:
+            channel.task = None
+            if not channel.pending:
+                self._channels.pop(key, None)
+
+    async def close(self) -> None:
+        tasks = [c.task for c in self._channels.values() if c.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._channels.clear()
@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+from galaxtic import logger, settings
+from galaxtic.db.cache import RecordCache
+
+__all__ = [
+    "ResponseCache",
+    "response_key",
+    "get_response_cache",
+    "close_response_cache",
+]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def response_key(model: str, template: str, text: str, params: dict[str, Any]) -> str:
+    """Content address of an LLM response: model, template, input and sampling."""
+    payload = json.dumps(
+        [model, template, _normalize(text), params], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """SQLite key/value table with a TTL and an entry cap (LRU by last access)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS response (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path: Path, ttl: float, max_entries: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(self.SCHEMA)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS response_accessed ON response (accessed_at)"
+        )
+        self._conn.commit()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM response WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] + self.ttl < now:
+                self._conn.execute("DELETE FROM response WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE response SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._writes += 1
+            # Trimming scans the index, so only do it every so often
+            if self._writes % 100 == 0:
+                self._trim(now)
+            self._conn.commit()
+
+    def _trim(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM response WHERE created_at < ?", (now - self.ttl,)
+        )
+        self._conn.execute(
+            """
+            DELETE FROM response WHERE key IN (
+                SELECT key FROM response ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._trim(time.time())
+            self._conn.commit()
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for deterministic LLM prompts.
+
+    Lookups hit an in-memory LRU first (shared fetches for concurrent
+    misses), then an optional SQLite file so answers survive restarts. Only
+    misses on both tiers reach the API.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        memory_size: int = 1000,
+        ttl: float = 7 * 24 * 3600,
+        max_entries: int = 50_000,
+    ):
+        self._memory = RecordCache(max_size=memory_size, ttl=ttl)
+        self._disk = _DiskTier(Path(path), ttl, max_entries) if path else None
+        self.disk_hits = 0
+        self.calls = 0
+
+    def stats(self) -> dict[str, float]:
+        memory = self._memory.stats()
+        # Every lookup starts in memory, so its hits + misses count all of them
+        total = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.disk_hits
+        return {
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "calls": self.calls,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """Return a cached response without calling the API."""
+        value = self._memory.peek(key)
+        if value is not None:
+            return value
+        value = await self._load(key)
+        if value is not None:
+            self._memory.put(key, value)
+        return value
+
+    async def get(self, key: str, call: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached response for ``key``, calling ``call`` on a miss."""
+
+        async def fetch() -> str:
+            value = await self._load(key)
+            if value is None:
+                value = await call()
+                await self.store(key, value)
+            return value
+
+        return await self._memory.get(key, fetch)
+
+    async def store(self, key: str, value: str) -> None:
+        self._memory.put(key, value)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put, key, value)
+
+    async def _load(self, key: str) -> Optional[str]:
+        if self._disk is None:
+            self.calls += 1
+            return None
+        value = await asyncio.to_thread(self._disk.get, key)
+        if value is None:
+            self.calls += 1
+        else:
+            self.disk_hits += 1
+        return value
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the shared LLM response cache"""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            settings.AI.RESPONSE_CACHE_PATH,
+            memory_size=settings.AI.RESPONSE_CACHE_SIZE,
+            ttl=settings.AI.RESPONSE_CACHE_TTL,
+            max_entries=settings.AI.RESPONSE_CACHE_MAX_ENTRIES,
+        )
+    return _cache
+
+
+def close_response_cache() -> None:
+    global _cache
+    if _cache is not None:
+        logger.info(f"LLM response cache stats: {_cache.stats()}")
+        _cache.close()
+        _cache = None
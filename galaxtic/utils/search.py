@@ -0,0 +1,472 @@
+import asyncio
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Collection, Optional
+from galaxtic import logger, settings
+from galaxtic.db.batch import BatchWriter
+
+__all__ = ["SearchIndex", "tokenize", "get_search_index", "close_search_index"]
+
+_TOKEN = re.compile(r"\w{2,40}")
+
+# Channel slot of a document that was pruned or never stored
+_GONE = 0xFFFFFFFF
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+def _first_pair(postings: array, doc_id: int) -> int:
+    """Index of the first (doc id, tf) pair with a doc id >= ``doc_id``."""
+    lo, hi = 0, len(postings) // 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if postings[2 * mid] < doc_id:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class SearchIndex:
+    """
+    BM25 full-text index over AI channel messages.
+
+    Documents get consecutive integer ids and each term's postings are one
+    flat ``array('I')`` of (doc id, term frequency) pairs in id order, so
+    adding a message appends to a few arrays and forgetting the oldest ones
+    trims a prefix. Past ``max_docs`` documents the oldest are forgotten.
+
+    The index is read from SQLite by ``open``, in a worker thread; the other
+    coroutines call it themselves on first use. Documents are written to
+    SQLite in batches behind a ``BatchWriter``; the
+    postings of the terms that changed are saved every ``snapshot_every``
+    documents and on close, and documents newer than the last save are
+    re-indexed on load. Searches are scored in a worker thread over copies
+    of the arrays and only look at the newest ``max_postings`` documents of
+    each term.
+
+    ``prune`` removes documents from the middle: they are tombstoned in
+    memory and their postings go away once they are old enough to be
+    forgotten.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS doc (
+            id INTEGER PRIMARY KEY,
+            guild_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            author TEXT,
+            content TEXT NOT NULL,
+            timestamp TEXT,
+            length INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS doc_channel ON doc (guild_id, channel_id, id);
+        CREATE TABLE IF NOT EXISTS posting (
+            term TEXT PRIMARY KEY,
+            data BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_docs: int = 500_000,
+        snapshot_every: int = 1000,
+        max_postings: int = 20_000,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.path = Path(path)
+        self.max_docs = max_docs
+        self.snapshot_every = snapshot_every
+        self.max_postings = max_postings
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, array] = {}
+        # Per document, indexed by doc id - _first
+        self._lengths = array("I")
+        self._slots = array("I")
+        # Channel slot -> (guild id, channel id)
+        self._channels: list[tuple[str, str]] = []
+        self._slot_of: dict[tuple[str, str], int] = {}
+        self._first = 0
+        self._next = 0
+        self._total_length = 0
+        self._gone = 0
+        self._dirty: set[str] = set()
+        self._saving: set[str] = set()
+        self._since_snapshot = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._writer = BatchWriter(self._write, max_batch=500, name="recall_index")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._opening: Optional[asyncio.Task] = None
+
+    async def open(self) -> None:
+        """Load the index from disk; concurrent and later calls wait for the same load."""
+        if self._opening is None:
+            self._opening = asyncio.create_task(asyncio.to_thread(self._open))
+        await asyncio.shield(self._opening)
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+            self._load()
+        except Exception:
+            # Nothing half-loaded may be saved back by close()
+            self._conn.close()
+            self._conn = None
+            raise
+
+    def __len__(self) -> int:
+        return self._next - self._first
+
+    def _skip(self) -> None:
+        """Reserve the next doc id for a document that is not there."""
+        self._lengths.append(0)
+        self._slots.append(_GONE)
+        self._gone += 1
+        self._next += 1
+
+    def _slot(self, key: tuple[str, str]) -> int:
+        slot = self._slot_of.get(key)
+        if slot is None:
+            slot = self._slot_of[key] = len(self._channels)
+            self._channels.append(key)
+        return slot
+
+    def _load(self) -> None:
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        indexed = meta.get("indexed", 0)
+        for doc_id, guild_id, channel_id, length in self._conn.execute(
+            "SELECT id, guild_id, channel_id, length FROM doc ORDER BY id"
+        ):
+            if not self._lengths:
+                self._first = self._next = doc_id
+            while self._next < doc_id:
+                # Pruned, or a document whose write never landed
+                self._skip()
+            self._lengths.append(length)
+            self._slots.append(self._slot((guild_id, channel_id)))
+            self._total_length += length
+            self._next += 1
+        if not self._lengths:
+            self._first = self._next = indexed
+        while self._next < indexed:
+            self._skip()
+        for term, data in self._conn.execute("SELECT term, data FROM posting"):
+            postings = array("I")
+            postings.frombytes(data)
+            # Saved before older documents were forgotten
+            del postings[: 2 * _first_pair(postings, self._first)]
+            if postings:
+                self._postings[term] = postings
+        replayed = 0
+        for doc_id, content in self._conn.execute(
+            "SELECT id, content FROM doc WHERE id >= ? ORDER BY id", (indexed,)
+        ):
+            self._index(doc_id, content)
+            replayed += 1
+        self._since_snapshot = replayed
+        logger.info(
+            f"Loaded search index: {len(self)} documents, {len(self._postings)} terms"
+            f" ({replayed} re-indexed)"
+        )
+
+    def _index(self, doc_id: int, content: str) -> int:
+        counts = Counter(tokenize(content))
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array("I")
+            postings.append(doc_id)
+            postings.append(tf)
+            self._dirty.add(term)
+        return sum(counts.values())
+
+    async def add(
+        self,
+        guild_id: str,
+        channel_id: str,
+        author: Optional[str],
+        content: str,
+        timestamp: Optional[str] = None,
+    ) -> None:
+        await self.open()
+        doc_id = self._next
+        self._next += 1
+        length = self._index(doc_id, content)
+        self._lengths.append(length)
+        self._slots.append(self._slot((guild_id, channel_id)))
+        self._total_length += length
+        if len(self) > self.max_docs * 1.1:
+            # Forget in batches; every term's postings are touched
+            self._forget(self._next - self.max_docs)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every and self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self.snapshot())
+        self._writer.start()
+        await self._writer.put(
+            (doc_id, guild_id, channel_id, author, content, timestamp, length)
+        )
+
+    async def _write(self, rows: list[tuple]) -> None:
+        await asyncio.to_thread(self._insert, rows)
+
+    def _insert(self, rows: list[tuple]) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            # Rows carry their doc id, so a retried batch just overwrites itself
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO doc VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def _forget(self, first: int) -> None:
+        """Drop every document with an id below ``first``."""
+        dropped = first - self._first
+        self._total_length -= sum(self._lengths[:dropped])
+        self._gone -= self._slots[:dropped].count(_GONE)
+        del self._lengths[:dropped]
+        del self._slots[:dropped]
+        self._first = first
+        for term in list(self._postings):
+            postings = self._postings[term]
+            cut = _first_pair(postings, first)
+            if not cut:
+                continue
+            del postings[: 2 * cut]
+            if not postings:
+                del self._postings[term]
+            self._dirty.add(term)
+        logger.info(f"Search index forgot {dropped} old documents")
+
+    async def prune(
+        self,
+        guild_id: str,
+        channel_id: str,
+        *,
+        before: Optional[str] = None,
+        keep: Optional[int] = None,
+    ) -> int:
+        """
+        Remove a channel's documents timestamped before ``before`` and those
+        past its newest ``keep``; returns how many were removed.
+        """
+        if before is None and keep is None:
+            return 0
+        await self.open()
+        ids = await asyncio.to_thread(
+            self._delete, guild_id, channel_id, before, keep
+        )
+        for doc_id in ids:
+            offset = doc_id - self._first
+            if offset < 0 or self._slots[offset] == _GONE:
+                continue
+            self._total_length -= self._lengths[offset]
+            self._lengths[offset] = 0
+            self._slots[offset] = _GONE
+            self._gone += 1
+        return len(ids)
+
+    def _delete(
+        self, guild_id: str, channel_id: str, before: Optional[str], keep: Optional[int]
+    ) -> list[int]:
+        with self._lock:
+            if self._conn is None:
+                return []
+            ids: set[int] = set()
+            if before is not None:
+                ids.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT id FROM doc WHERE guild_id = ? AND channel_id = ?"
+                        " AND timestamp < ?",
+                        (guild_id, channel_id, before),
+                    )
+                )
+            if keep is not None:
+                ids.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT id FROM doc WHERE guild_id = ? AND channel_id = ?"
+                        " ORDER BY id DESC LIMIT -1 OFFSET ?",
+                        (guild_id, channel_id, keep),
+                    )
+                )
+            self._conn.executemany("DELETE FROM doc WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+            return sorted(ids)
+
+    async def snapshot(self) -> None:
+        """Save the postings of the terms that changed since the last snapshot."""
+        terms, self._dirty = self._dirty, set()
+        self._saving |= terms
+        data = [(t, self._postings[t].tobytes()) for t in terms if t in self._postings]
+        removed = [(t,) for t in terms if t not in self._postings]
+        self._since_snapshot = 0
+        try:
+            await asyncio.to_thread(self._save, data, removed, self._next, self._first)
+        except Exception as e:
+            logger.error(f"Failed to save the search index: {e}")
+            self._dirty |= terms
+        finally:
+            self._saving -= terms
+            self._snapshot_task = None
+
+    def _save(
+        self, data: list[tuple], removed: list[tuple], indexed: int, first: int
+    ) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.executemany("INSERT OR REPLACE INTO posting VALUES (?, ?)", data)
+            self._conn.executemany("DELETE FROM posting WHERE term = ?", removed)
+            self._conn.execute("DELETE FROM doc WHERE id < ?", (first,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('indexed', ?)", (indexed,)
+            )
+            self._conn.commit()
+
+    async def search(
+        self,
+        query: str,
+        *,
+        guild_id: str,
+        channel_ids: Optional[Collection[str]] = None,
+        limit: int = 5,
+    ) -> list[dict]:
+        """Best ``limit`` messages of a guild (or of some of its channels) for ``query``, best first."""
+        await self.open()
+        terms = set(tokenize(query))
+        total = len(self) - self._gone
+        if not terms or not total:
+            return []
+        allowed = {
+            slot
+            for slot, (g, c) in enumerate(self._channels)
+            if g == guild_id and (channel_ids is None or c in channel_ids)
+        }
+        if not allowed:
+            return []
+        postings = [self._postings[t] for t in terms if t in self._postings]
+        # Terms in most documents barely move BM25 but cost the most to score
+        rare = [p for p in postings if len(p) // 2 <= total // 2]
+        # Copies, since documents keep being added and forgotten meanwhile;
+        # the newest postings of a term are kept along with its full df
+        postings = [
+            (len(p) // 2, p[-2 * self.max_postings :]) for p in rare or postings
+        ]
+        best = await asyncio.to_thread(
+            self._rank,
+            postings,
+            self._first,
+            self._lengths[:],
+            self._slots[:],
+            allowed,
+            total,
+            self._total_length / total or 1.0,
+            limit,
+        )
+        rows = await asyncio.to_thread(self._fetch, [doc_id for doc_id, _ in best])
+        return [
+            {**rows[doc_id], "score": score} for doc_id, score in best if doc_id in rows
+        ]
+
+    def _rank(
+        self,
+        postings: list[tuple[int, array]],
+        first: int,
+        lengths: array,
+        slots: array,
+        allowed: set[int],
+        total: int,
+        avgdl: float,
+        limit: int,
+    ) -> list[tuple[int, float]]:
+        k1, b = self.k1, self.b
+        scores: dict[int, float] = {}
+        for df, plist in postings:
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for i in range(0, len(plist), 2):
+                doc_id = plist[i]
+                offset = doc_id - first
+                if slots[offset] not in allowed:
+                    continue
+                tf = plist[i + 1]
+                norm = k1 * (1 - b + b * lengths[offset] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def _fetch(self, ids: list[int]) -> dict[int, dict]:
+        with self._lock:
+            if self._conn is None or not ids:
+                return {}
+            cursor = self._conn.execute(
+                "SELECT id, guild_id, channel_id, author, content, timestamp FROM doc "
+                f"WHERE id IN ({','.join('?' * len(ids))})",
+                ids,
+            )
+            return {
+                row[0]: dict(
+                    zip(("guild_id", "channel_id", "author", "content", "timestamp"), row[1:])
+                )
+                for row in cursor
+            }
+
+    async def close(self) -> None:
+        """Save what is left and close; also covers a snapshot still in flight."""
+        await self._writer.close()
+        if self._conn is None:
+            return  # never opened, or failed to load
+        terms = self._dirty | self._saving
+        data = [(t, self._postings[t].tobytes()) for t in terms if t in self._postings]
+        removed = [(t,) for t in terms if t not in self._postings]
+        await asyncio.to_thread(self._close, data, removed, self._next, self._first)
+
+    def _close(
+        self, data: list[tuple], removed: list[tuple], indexed: int, first: int
+    ) -> None:
+        self._save(data, removed, indexed, first)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> SearchIndex:
+    """Get the shared AI channel search index"""
+    global _index
+    if _index is None:
+        _index = SearchIndex(
+            settings.AI.RECALL_INDEX_PATH, max_docs=settings.AI.RECALL_MAX_DOCS
+        )
+    return _index
+
+
+async def close_search_index() -> None:
+    global _index
+    if _index is not None:
+        await _index.close()
+        _index = None
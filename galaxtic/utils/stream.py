@@ -0,0 +1,135 @@
+import re
+import time
+from typing import AsyncIterable, Awaitable, Callable, Optional
+import discord
+
+__all__ = ["MessageStreamer"]
+
+DISCORD_LIMIT = 2000
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+
+def _split_point(text: str, limit: int) -> int:
+    """Index to cut ``text`` at so the head fits in ``limit`` characters."""
+    for sep in ("\n\n", "\n", ". ", " "):
+        idx = text.rfind(sep, 0, limit)
+        if idx > limit // 2:
+            return idx + len(sep)
+    return limit
+
+
+def _open_fence(text: str) -> Optional[tuple[int, str, str]]:
+    """Offset, line and fence of the code block ``text`` ends inside, if any."""
+    block = None
+    offset = 0
+    for line in text.split("\n"):
+        match = _FENCE.match(line)
+        if block is None and match:
+            block = (offset, line, match.group(1))
+        elif block is not None and line.strip().startswith(block[2][0] * len(block[2])):
+            block = None
+        offset += len(line) + 1
+    return block
+
+
+def _split(text: str, limit: int) -> tuple[str, str]:
+    """
+    Cut ``text`` into a head that fits in ``limit`` characters and the rest.
+
+    A cut inside a fenced code block closes the fence at the end of the head
+    and reopens it at the start of the rest.
+    """
+    cut = _split_point(text, limit)
+    block = _open_fence(text[:cut])
+    if block is not None and cut > limit - len(block[2]) - 1:
+        # Leave room for the closing fence
+        cut = _split_point(text, limit - len(block[2]) - 1)
+        block = _open_fence(text[:cut])
+    if block is None:
+        return text[:cut], text[cut:]
+    start, opener, fence = block
+    if start and not text[start + len(opener) : cut].strip():
+        # Nothing of the block would land in the head; start it afresh
+        return text[:start], text[start:]
+    return f"{text[:cut].rstrip()}\n{fence}", f"{opener}\n{text[cut:]}"
+
+
+class MessageStreamer:
+    """
+    Progressively writes streamed text into Discord messages.
+
+    The first non-blank text is sent right away through ``send``; after that
+    the message is edited at most once per ``interval`` seconds (or sooner
+    once ``every_tokens`` tokens have arrived) to stay well inside Discord's
+    edit rate limits. Text that outgrows ``limit`` characters rolls over
+    into a new message sent through ``send_more`` (defaults to ``send``),
+    closing and reopening a code fence the cut falls inside.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[discord.Message]],
+        send_more: Optional[Callable[[str], Awaitable[discord.Message]]] = None,
+        *,
+        interval: float = 1.0,
+        every_tokens: int = 60,
+        limit: int = DISCORD_LIMIT,
+    ):
+        self._send = send
+        self._send_more = send_more or send
+        self.interval = interval
+        self.every_tokens = every_tokens
+        self.limit = limit
+        self.messages: list[discord.Message] = []
+        self._parts: list[str] = []
+        self._current = ""  # text of the message being written
+        self._shown = ""  # what Discord currently shows for it
+        self._pending_tokens = 0
+        self._last_flush = 0.0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    async def stream(self, tokens: AsyncIterable[str]) -> str:
+        async for token in tokens:
+            await self.feed(token)
+        return await self.finish()
+
+    async def feed(self, token: str) -> None:
+        self._parts.append(token)
+        self._current += token
+        self._pending_tokens += 1
+        while len(self._current) > self.limit:
+            head, self._current = _split(self._current, self.limit)
+            await self._write(head)
+            self.messages.append(None)  # next write opens a new message
+            self._shown = ""
+        if not self._current.strip():
+            return
+        due = time.monotonic() - self._last_flush >= self.interval
+        if not self.messages or due or self._pending_tokens >= self.every_tokens:
+            await self._write(self._current)
+
+    async def finish(self) -> str:
+        """Write out whatever is left and return the full text."""
+        if self._current.strip():
+            await self._write(self._current)
+        if self.messages and self.messages[-1] is None:
+            self.messages.pop()
+        return self.text.strip()
+
+    async def _write(self, content: str) -> None:
+        content = content.strip()
+        if not content or content == self._shown:
+            return
+        if not self.messages:
+            self.messages.append(await self._send(content))
+        elif self.messages[-1] is None:
+            self.messages[-1] = await self._send_more(content)
+        else:
+            await self.messages[-1].edit(content=content)
+        self._shown = content
+        self._pending_tokens = 0
+        self._last_flush = time.monotonic()
@@ -0,0 +1,121 @@
+import asyncio
+import html
+import re
+from typing import AsyncIterable, AsyncIterator, Iterator, Optional
+import aiohttp
+import yt_dlp
+from galaxtic import settings
+from galaxtic.utils.llm import get_llm
+
+__all__ = ["SubtitleError", "subtitle_url", "iter_vtt_text", "fetch_transcript"]
+
+_TAG = re.compile(r"<[^>]+>")
+_TIMING = "-->"
+
+
+class SubtitleError(Exception):
+    pass
+
+
+def subtitle_url(info: dict, lang: str) -> Optional[str]:
+    """
+    URL of the best VTT track for ``lang`` in a yt-dlp info dict.
+
+    Uploaded subtitles win over automatic captions, and an exact language
+    match over a regional variant (``en`` before ``en-US``).
+    """
+    for source in ("subtitles", "automatic_captions"):
+        tracks = info.get(source) or {}
+        candidates = [lang] + sorted(k for k in tracks if k.startswith(f"{lang}-"))
+        for key in candidates:
+            for track in tracks.get(key) or []:
+                if track.get("ext") == "vtt" and track.get("url"):
+                    return track["url"]
+    return None
+
+
+class _VTTParser:
+    """
+    Line-at-a-time WebVTT parser yielding caption text.
+
+    Auto-generated captions repeat every line once as a word-timed cue
+    (``<c>`` tags) and again in the following cue; word-timed cues are
+    skipped and lines identical to the previous one are dropped.
+    """
+
+    def __init__(self):
+        self._cue: list[str] = []
+        self._in_cue = False
+        self._prev: Optional[str] = None
+
+    def feed(self, line: str) -> Iterator[str]:
+        line = line.rstrip("\r\n")
+        if _TIMING in line:
+            self._in_cue = True
+            self._cue = []
+        elif not line:
+            # Only a truly empty line ends a cue; auto captions pad with " "
+            yield from self._end_cue()
+        elif self._in_cue:
+            self._cue.append(line)
+
+    def close(self) -> Iterator[str]:
+        yield from self._end_cue()
+
+    def _end_cue(self) -> Iterator[str]:
+        cue, self._cue, self._in_cue = self._cue, [], False
+        if any("<c>" in line for line in cue):
+            return
+        for line in cue:
+            text = html.unescape(_TAG.sub("", line)).strip()
+            if not text:
+                continue
+            if text != self._prev:
+                yield text
+            self._prev = text
+
+
+async def iter_vtt_text(lines: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Caption text of a VTT byte stream, deduplicated as it is read."""
+    parser = _VTTParser()
+    async for raw in lines:
+        for text in parser.feed(raw.decode("utf-8", errors="replace")):
+            yield text
+    for text in parser.close():
+        yield text
+
+
+def _extract_info(url: str) -> dict:
+    ydl_opts = {
+        "skip_download": True,
+        "quiet": True,
+        "cookiefile": settings.COOKIES_FILE,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+async def fetch_transcript(
+    url: str, lang: str = "en", *, session: Optional[aiohttp.ClientSession] = None
+) -> str:
+    """
+    Plain-text transcript of a video from its subtitles.
+
+    One yt-dlp metadata pass finds the subtitle URL; the track is then
+    streamed over HTTP and parsed in memory, without touching the disk.
+    ``session`` defaults to the shared session of the LLM client.
+    """
+    info = await asyncio.to_thread(_extract_info, url)
+    track = subtitle_url(info, lang)
+    if track is None:
+        raise SubtitleError("No subtitles found.")
+    parts = []
+    session = session or get_llm().session
+    async with session.get(track) as resp:
+        if resp.status != 200:
+            raise SubtitleError(f"Failed to fetch subtitles ({resp.status})")
+        async for text in iter_vtt_text(resp.content):
+            parts.append(text)
+    if not parts:
+        raise SubtitleError("No subtitles found.")
+    return " ".join(parts)
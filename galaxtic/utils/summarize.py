@@ -0,0 +1,112 @@
+import asyncio
+import random
+from typing import Awaitable, Callable
+from galaxtic import logger
+from galaxtic.utils.chunker import chunk_text, estimate_tokens
+
+__all__ = ["MapReduceSummarizer"]
+
+MAP_PROMPT = (
+    "Part {index}/{total} of a long transcript:\n{chunk}\n\n"
+    "Please summarize this part clearly and briefly."
+)
+COMBINE_PROMPT = (
+    "Here are summaries of consecutive parts of a long transcript. "
+    "Merge them into one summary of the whole section, keeping every key point:\n\n"
+    "{summaries}"
+)
+FINAL_PROMPT = (
+    "Here are partial summaries of a long transcript. Do not mention about "
+    "transcript only give the summary. Combine them into one final clear and "
+    "concise summary:\n\n{summaries}"
+)
+
+
+class MapReduceSummarizer:
+    """
+    Summarize text that does not fit in one LLM call.
+
+    The text is split into chunks that are summarized concurrently (at most
+    ``max_concurrency`` calls at once); results keep the chunk order and a
+    failing chunk is retried up to ``max_retries`` times. If the partial
+    summaries together still exceed ``reduce_tokens`` tokens they are
+    combined in groups, level by level, until a single final call fits.
+    """
+
+    def __init__(
+        self,
+        chat: Callable[[str], Awaitable[str]],
+        *,
+        chunk_tokens: int = 4000,
+        reduce_tokens: int = 4000,
+        max_concurrency: int = 4,
+        max_retries: int = 2,
+    ):
+        self._chat = chat
+        self.chunk_tokens = chunk_tokens
+        self.reduce_tokens = reduce_tokens
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def summarize(self, text: str) -> str:
+        chunks = chunk_text(text, self.chunk_tokens)
+        logger.info(f"Summarizing {len(chunks)} chunks")
+        partials = await self._gather(
+            [
+                MAP_PROMPT.format(index=i + 1, total=len(chunks), chunk=chunk)
+                for i, chunk in enumerate(chunks)
+            ]
+        )
+        level = 1
+        while len(partials) > 1 and _joined_tokens(partials) > self.reduce_tokens:
+            groups = self._group(partials)
+            logger.info(
+                f"Reduce level {level}: combining {len(partials)} summaries in {len(groups)} groups"
+            )
+            partials = await self._gather(
+                [COMBINE_PROMPT.format(summaries="\n\n".join(g)) for g in groups]
+            )
+            level += 1
+        return await self._call(FINAL_PROMPT.format(summaries="\n\n".join(partials)))
+
+    def _group(self, partials: list[str]) -> list[list[str]]:
+        """Pack consecutive summaries into groups that fit ``reduce_tokens``.
+
+        Every group holds at least two summaries so each level at least
+        halves the count, even when single summaries are oversized.
+        """
+        groups: list[list[str]] = []
+        current: list[str] = []
+        for partial in partials:
+            if len(current) >= 2 and _joined_tokens(current + [partial]) > self.reduce_tokens:
+                groups.append(current)
+                current = []
+            current.append(partial)
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        elif current:
+            groups.append(current)
+        return groups
+
+    async def _gather(self, prompts: list[str]) -> list[str]:
+        return list(await asyncio.gather(*(self._call(p) for p in prompts)))
+
+    async def _call(self, prompt: str) -> str:
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    return (await self._chat(prompt)).strip()
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = random.uniform(0.5, 1.5) * 2**attempt
+                logger.warning(
+                    f"Summary call failed (attempt {attempt}), retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+
+def _joined_tokens(parts: list[str]) -> int:
+    return sum(estimate_tokens(p) for p in parts)
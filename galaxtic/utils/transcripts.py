@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+from galaxtic import logger, settings
+
+__all__ = ["TranscriptStore", "get_transcript_store", "close_transcript_store"]
+
+
+class TranscriptStore:
+    """
+    On-disk store of video transcripts and their summaries.
+
+    Transcripts are keyed by (video id, language), zlib-compressed and stored
+    once per distinct text, so identical subtitle tracks share one blob. When
+    the compressed text outgrows ``max_bytes`` the least recently used videos
+    are evicted.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blob (
+            hash TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS transcript (
+            video_id TEXT NOT NULL,
+            lang TEXT NOT NULL,
+            hash TEXT NOT NULL REFERENCES blob (hash),
+            summary TEXT,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (video_id, lang)
+        );
+        CREATE INDEX IF NOT EXISTS transcript_accessed ON transcript (accessed_at);
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+    async def text(self, video_id: str, lang: str) -> Optional[str]:
+        return await asyncio.to_thread(self._text, video_id, lang)
+
+    async def summary(self, video_id: str, lang: str) -> Optional[str]:
+        return await asyncio.to_thread(self._summary, video_id, lang)
+
+    async def put_text(self, video_id: str, lang: str, text: str) -> None:
+        await asyncio.to_thread(self._put_text, video_id, lang, text)
+
+    async def put_summary(self, video_id: str, lang: str, summary: str) -> None:
+        await asyncio.to_thread(self._put_summary, video_id, lang, summary)
+
+    def _touch(self, video_id: str, lang: str) -> None:
+        self._conn.execute(
+            "UPDATE transcript SET accessed_at = ? WHERE video_id = ? AND lang = ?",
+            (time.time(), video_id, lang),
+        )
+        self._conn.commit()
+
+    def _text(self, video_id: str, lang: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT blob.data FROM transcript JOIN blob ON blob.hash = transcript.hash
+                WHERE video_id = ? AND lang = ?
+                """,
+                (video_id, lang),
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch(video_id, lang)
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def _summary(self, video_id: str, lang: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM transcript WHERE video_id = ? AND lang = ?",
+                (video_id, lang),
+            ).fetchone()
+            if row is None or row[0] is None:
+                return None
+            self._touch(video_id, lang)
+        return row[0]
+
+    def _put_text(self, video_id: str, lang: str, text: str) -> None:
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        data = zlib.compress(raw, 6)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blob VALUES (?, ?, ?)", (digest, data, len(data))
+            )
+            # A changed transcript invalidates the summary made from the old one
+            self._conn.execute(
+                """
+                INSERT INTO transcript VALUES (?, ?, ?, NULL, ?)
+                ON CONFLICT (video_id, lang) DO UPDATE SET
+                    summary = CASE WHEN hash = excluded.hash THEN summary END,
+                    hash = excluded.hash,
+                    accessed_at = excluded.accessed_at
+                """,
+                (video_id, lang, digest, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _put_summary(self, video_id: str, lang: str, summary: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE transcript SET summary = ? WHERE video_id = ? AND lang = ?",
+                (summary, video_id, lang),
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        self._conn.execute(
+            "DELETE FROM blob WHERE hash NOT IN (SELECT hash FROM transcript)"
+        )
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blob"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            """
+            SELECT video_id, lang, transcript.hash, blob.size
+            FROM transcript JOIN blob ON blob.hash = transcript.hash
+            ORDER BY accessed_at
+            """
+        ).fetchall()
+        refs: dict[str, int] = {}
+        for _, _, digest, _ in rows:
+            refs[digest] = refs.get(digest, 0) + 1
+        evicted = 0
+        for video_id, lang, digest, size in rows[:-1]:  # always keep the newest
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(
+                "DELETE FROM transcript WHERE video_id = ? AND lang = ?",
+                (video_id, lang),
+            )
+            refs[digest] -= 1
+            if not refs[digest]:
+                total -= size
+            evicted += 1
+        self._conn.execute(
+            "DELETE FROM blob WHERE hash NOT IN (SELECT hash FROM transcript)"
+        )
+        logger.info(f"Evicted {evicted} transcripts from the transcript store")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[TranscriptStore] = None
+
+
+def get_transcript_store() -> TranscriptStore:
+    """Get the shared transcript store"""
+    global _store
+    if _store is None:
+        _store = TranscriptStore(
+            settings.AI.TRANSCRIPT_STORE_PATH,
+            max_bytes=settings.AI.TRANSCRIPT_STORE_MAX_MB * 1024 * 1024,
+        )
+    return _store
+
+
+def close_transcript_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
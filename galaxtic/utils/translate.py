@@ -0,0 +1,130 @@
+import asyncio
+import re
+from galaxtic import logger, settings
+from galaxtic.bot import GalaxticBot
+from galaxtic.utils.ai import CHAT_PARAMS, llama_chat
+from galaxtic.utils.chunker import estimate_tokens
+from galaxtic.utils.langid import detect_language, needs_translation
+from galaxtic.utils.llm import CHAT_MODEL
+from galaxtic.utils.response_cache import get_response_cache, response_key
+
+__all__ = ["BATCH_PROMPT", "translate_many"]
+
+BATCH_PROMPT = """You are an expert translator. Translate each numbered segment below into the English language.
+    Keep the numbering: start every translation on a new line with its number in square brackets, exactly like the input, e.g. "[3] translated text".
+    Translate every segment, in order, and output nothing else. If a segment is already English, repeat it unchanged.
+
+{segments}"""
+
+# Cache key template for a single segment translated through BATCH_PROMPT
+SEGMENT_KEY = "translate_segment:{text}"
+
+_MARKER = re.compile(r"^\s*\[(\d+)\]\s?", re.MULTILINE)
+
+
+def _pack(texts: list[str], max_tokens: int) -> list[list[int]]:
+    """Group indexes of ``texts`` into batches of about ``max_tokens`` tokens."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text) + 4  # "[n] " and the newline
+        if current and used + tokens > max_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _parse(response: str, count: int) -> dict[int, str]:
+    """Map 1-based segment numbers to their translations."""
+    found: dict[int, str] = {}
+    matches = list(_MARKER.finditer(response))
+    for match, following in zip(matches, matches[1:] + [None]):
+        number = int(match.group(1))
+        end = following.start() if following else len(response)
+        text = response[match.end() : end].strip()
+        if 1 <= number <= count and text and number not in found:
+            found[number] = text
+    return found
+
+
+async def _translate_batch(
+    bot: GalaxticBot, texts: list[str], **kwargs
+) -> list[str | None]:
+    segments = "\n".join(
+        # Segments are one line each so the numbering stays unambiguous
+        f"[{n}] {' '.join(text.split())}"
+        for n, text in enumerate(texts, 1)
+    )
+    response = await llama_chat(bot, BATCH_PROMPT.format(segments=segments), **kwargs)
+    found = _parse(response, len(texts))
+    return [found.get(n) for n in range(1, len(texts) + 1)]
+
+
+async def translate_many(
+    bot: GalaxticBot, texts: list[str], *, max_tokens: int | None = None, **kwargs
+) -> list[str]:
+    """
+    Translate ``texts`` to English with as few LLM calls as possible.
+
+    Identical texts are translated once; cached ones, and those detected as
+    English or as having no words at all, are not sent. The rest are packed
+    into numbered batches of about ``max_tokens`` input tokens that run
+    concurrently. Segments missing from a response are retried once
+    and returned untranslated if they are still missing; a batch whose call
+    fails is returned untranslated without affecting the others. Results come
+    back in the order of ``texts``.
+    """
+    max_tokens = max_tokens or settings.AI.CONTEXT_TOKENS // 3
+    cache = get_response_cache()
+    unique = list(dict.fromkeys(texts))
+    keys = [response_key(CHAT_MODEL, SEGMENT_KEY, text, CHAT_PARAMS) for text in unique]
+    results: dict[str, str] = {}
+    for text, key in zip(unique, keys):
+        if not needs_translation(detect_language(text)):
+            results[text] = text
+            continue
+        cached = await cache.lookup(key)
+        if cached is not None:
+            results[text] = cached
+
+    todo = [text for text in unique if text not in results]
+    fresh: set[str] = set()
+    failed = 0
+    for attempt in range(2):
+        if not todo:
+            break
+        batches = [[todo[i] for i in batch] for batch in _pack(todo, max_tokens)]
+        logger.info(
+            f"Translating {len(todo)} segments in {len(batches)} batches (attempt {attempt + 1})"
+        )
+        outputs = await asyncio.gather(
+            *(_translate_batch(bot, batch, **kwargs) for batch in batches),
+            return_exceptions=True,
+        )
+        missing = []
+        for batch, output in zip(batches, outputs):
+            if isinstance(output, BaseException):
+                if not isinstance(output, Exception):
+                    raise output
+                logger.warning(f"Translating a batch of {len(batch)} segments failed: {output}")
+                failed += len(batch)
+                continue
+            for text, translated in zip(batch, output):
+                if translated is None:
+                    missing.append(text)
+                else:
+                    results[text] = translated
+                    fresh.add(text)
+        todo = missing
+
+    if todo or failed:
+        logger.warning(f"{len(todo) + failed} segments came back untranslated")
+    for text, key in zip(unique, keys):
+        if text in fresh:
+            await cache.store(key, results[text])
+    return [results.get(text, text) for text in texts]